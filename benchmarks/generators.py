@@ -0,0 +1,223 @@
+"""Synthetic sheets for the benchmarks.
+
+All generators are deterministic: the same arguments give the same data,
+so results can be compared between commits.
+"""
+
+import random
+from copy import deepcopy
+
+from sheetwhat.ranges import numbers_to_letters
+
+CHART_TYPES = ["AREA", "BAR", "COLUMN", "LINE", "SCATTER", "COMBO"]
+SUMMARIZE_FUNCTIONS = ["SUM", "COUNTA", "AVERAGE", "MAX", "MIN"]
+CONDITIONS = ["NUMBER_GREATER", "NUMBER_LESS", "TEXT_CONTAINS", "CUSTOM_FORMULA"]
+
+
+def cell_name(i, j):
+    return f"{numbers_to_letters(j)}{i + 1}"
+
+
+def range_name(n_rows, n_columns):
+    return f"A1:{cell_name(n_rows - 1, n_columns - 1)}"
+
+
+def cell_value(rng, j):
+    """A value like the ones in a data sheet: numbers, text and some empty cells."""
+    kind = j % 4
+    if kind == 0:
+        return rng.randint(0, 10000)
+    if kind == 1:
+        return round(rng.uniform(-1000, 1000), rng.randint(0, 6))
+    if kind == 2:
+        return rng.choice(["north", "east", "south", "west", ""])
+    return None if rng.random() < 0.2 else rng.random()
+
+
+def cell_formula(rng, i, j):
+    """A formula that refers to cells above or to the left, or a plain value."""
+    if i == 0 or j == 0 or rng.random() < 0.3:
+        return cell_value(rng, j)
+    above, left = cell_name(i - 1, j), cell_name(i, j - 1)
+    return rng.choice(
+        [
+            f"={above} + {left}",
+            f"=SUM({cell_name(0, j)}:{above})",
+            f"=IF({left} > 0, {above}, 0)",
+            f"=VLOOKUP({left}, $A$1:$D${i}, 2, FALSE)",
+            f"=ROUND(AVERAGE({above}, {left}) * 1.21, 2)",
+        ]
+    )
+
+
+def sheet(n_rows, n_columns, seed=0):
+    """Values and formulas of a sheet with ``n_rows * n_columns`` cells."""
+    rng = random.Random(seed)
+    formulas = [
+        [cell_formula(rng, i, j) for j in range(n_columns)] for i in range(n_rows)
+    ]
+    values = [
+        [
+            cell_value(rng, j) if isinstance(cell, str) else cell
+            for j, cell in enumerate(row)
+        ]
+        for row in formulas
+    ]
+    return {"values": values, "formulas": formulas}
+
+
+def sparse_sheet(n_rows, n_columns, n_cells, seed=0):
+    """Values and formulas of a mostly empty sheet, given by cell name."""
+    rng = random.Random(seed)
+    names = {
+        cell_name(rng.randrange(n_rows), rng.randrange(n_columns))
+        for _ in range(n_cells)
+    }
+    cells = {name: rng.randint(0, 10000) for name in sorted(names)}
+    return {"values": {"cells": cells}, "formulas": {"cells": dict(cells)}}
+
+
+def with_wrong_cell(data, field, i, j, cell="wrong"):
+    """A copy of the data with one cell replaced, like a student with one mistake."""
+    array_2d = [list(row) for row in data[field]]
+    array_2d[i][j] = cell
+    return {**data, field: array_2d}
+
+
+def pivot_table(index, n_values=10):
+    rng = random.Random(index)
+    return {
+        "source": {
+            "startRowIndex": 0,
+            "endRowIndex": rng.randint(100, 10000),
+            "startColumnIndex": 0,
+            "endColumnIndex": 8,
+        },
+        "rows": [
+            {
+                "sourceColumnOffset": rng.randrange(8),
+                "showTotals": True,
+                "sortOrder": rng.choice(["ASCENDING", "DESCENDING"]),
+            }
+        ],
+        "columns": [
+            {"sourceColumnOffset": 2, "showTotals": True, "sortOrder": "ASCENDING"}
+        ],
+        "values": [
+            {
+                "sourceColumnOffset": rng.randrange(8),
+                "summarizeFunction": rng.choice(SUMMARIZE_FUNCTIONS),
+                "calculatedDisplayType": "PERCENT_OF_ROW_TOTAL",
+            }
+            for _ in range(n_values)
+        ],
+        "criteria": {
+            str(offset): {
+                "visibleValues": [f"{month:02}-{offset}" for month in range(1, 13)]
+            }
+            for offset in range(3)
+        },
+    }
+
+
+def pivot_tables(n_rows, n_columns):
+    """A 2D array of pivot tables, one per cell, like the ``pivotTables`` field."""
+    return [
+        [pivot_table(i * n_columns + j) for j in range(n_columns)]
+        for i in range(n_rows)
+    ]
+
+
+def chart(index, n_series=4):
+    rng = random.Random(index)
+
+    def source_range(column):
+        return {
+            "sourceRange": {
+                "sources": [
+                    {
+                        "startRowIndex": 0,
+                        "endRowIndex": 100,
+                        "startColumnIndex": column,
+                        "endColumnIndex": column + 1,
+                    }
+                ]
+            }
+        }
+
+    return {
+        "chartId": rng.randrange(2 ** 31),
+        "spec": {
+            "title": f"Chart {index}",
+            "basicChart": {
+                "chartType": CHART_TYPES[index % len(CHART_TYPES)],
+                "legendPosition": "RIGHT_LEGEND",
+                "axis": [
+                    {"position": "BOTTOM_AXIS", "title": "Day"},
+                    {"position": "LEFT_AXIS", "title": f"Axis {index}"},
+                ],
+                "domains": [{"domain": source_range(0)}],
+                "series": [
+                    {"series": source_range(column), "targetAxis": "LEFT_AXIS"}
+                    for column in range(1, n_series + 1)
+                ],
+                "headerCount": 1,
+            },
+            "fontName": "Roboto",
+        },
+        "position": {
+            "overlayPosition": {
+                "anchorCell": {"sheetId": "Sheet1", "rowIndex": 20 * index},
+                "widthPixels": 600,
+                "heightPixels": 371,
+            }
+        },
+    }
+
+
+def dashboard(n_charts):
+    """Data with ``n_charts`` charts, and the same charts in reverse order."""
+    charts = [chart(index) for index in range(n_charts)]
+    solution = {"values": [[1]], "formulas": [[1]], "charts": charts}
+    student = {**solution, "charts": deepcopy(charts[::-1])}
+    return student, solution
+
+
+def conditional_format(index):
+    rng = random.Random(index)
+    start_row = rng.randrange(100)
+    condition = CONDITIONS[index % len(CONDITIONS)]
+    return {
+        "ranges": [
+            {
+                "sheetId": "Sheet1",
+                "startRowIndex": start_row,
+                "endRowIndex": start_row + rng.randint(1, 50),
+                "startColumnIndex": index % 10,
+                "endColumnIndex": index % 10 + 1,
+            }
+        ],
+        "booleanRule": {
+            "format": {
+                "backgroundColor": {
+                    "red": rng.random(),
+                    "green": rng.random(),
+                    "blue": rng.random(),
+                }
+            },
+            "condition": {
+                "type": condition,
+                "values": [{"userEnteredValue": str(rng.randint(0, 100))}],
+            },
+        },
+    }
+
+
+def conditional_formats(n_rules):
+    """Data with ``n_rules`` conditional format rules, and the same rules shuffled."""
+    rules = [conditional_format(index) for index in range(n_rules)]
+    shuffled = deepcopy(rules)
+    random.Random(n_rules).shuffle(shuffled)
+    solution = {"values": [[1]], "formulas": [[1]], "conditionalFormats": rules}
+    student = {**solution, "conditionalFormats": shuffled}
+    return student, solution
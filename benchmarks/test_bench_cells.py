@@ -0,0 +1,138 @@
+import pytest
+from protowhat.Reporter import Reporter
+from protowhat.Test import TestFail as TF
+
+from benchmarks.generators import range_name, sheet, sparse_sheet, with_wrong_cell
+from sheetwhat.checks import check_range, has_equal_references, has_equal_value
+from sheetwhat.sheet import parse_sparse, to_sheet
+from sheetwhat.State import State
+from sheetwhat.test_exercise import test_exercise as te
+from sheetwhat.test_exercise import test_exercise_batch as te_batch
+
+# number of cells: rows and columns
+SIZES = {"1e3": (50, 20), "1e4": (500, 20), "1e5": (5000, 20), "1e6": (50000, 20)}
+# parsing formulas is slow, so the checks on formulas skip the largest sheets
+FORMULA_SIZES = ["1e3", "1e4", "1e5"]
+
+SCT = [
+    "Ex().has_equal_value()",
+    "Ex().has_equal_formula()",
+    "Ex().has_equal_references()",
+]
+
+
+@pytest.fixture(scope="module", params=list(SIZES))
+def size(request):
+    return request.param
+
+
+@pytest.fixture(scope="module")
+def solution_data(size):
+    return sheet(*SIZES[size])
+
+
+@pytest.fixture(scope="module")
+def student_data(size):
+    # built separately, so nothing is shared with the solution
+    return sheet(*SIZES[size])
+
+
+def run_check(check, student_data, solution_data, sct_range, solution_cache, **kwargs):
+    state = State(
+        student_data,
+        solution_data,
+        sct_range,
+        reporter=Reporter(),
+        solution_cache=solution_cache,
+    )
+    try:
+        check(state, **kwargs)
+    except TF:
+        pass
+
+
+def test_check_range(benchmark, size, student_data, solution_data):
+    sct_range = range_name(*SIZES[size])
+    benchmark(
+        run_check,
+        check_range,
+        student_data,
+        solution_data,
+        sct_range,
+        {},
+        field="values",
+        field_msg="value",
+    )
+
+
+@pytest.mark.parametrize("storage", ["lists", "grid"])
+@pytest.mark.parametrize("correct", [True, False], ids=["correct", "last_cell_wrong"])
+def test_has_equal_value(
+    benchmark, size, student_data, solution_data, storage, correct
+):
+    n_rows, n_columns = SIZES[size]
+    if not correct:
+        student_data = with_wrong_cell(
+            student_data, "values", n_rows - 1, n_columns - 1
+        )
+    if storage == "grid":
+        solution_data = to_sheet(solution_data)
+    benchmark(
+        run_check,
+        has_equal_value,
+        student_data,
+        solution_data,
+        range_name(n_rows, n_columns),
+        {},
+    )
+
+
+def test_has_equal_value_sparse(benchmark):
+    # a million cells in the range, a thousand of them filled in
+    data = parse_sparse(sparse_sheet(50000, 20, 1000))
+    benchmark(run_check, has_equal_value, data, data, "A1:T50000", {})
+
+
+def test_has_equal_references(benchmark, size, student_data, solution_data):
+    if size not in FORMULA_SIZES:
+        pytest.skip("too many formulas")
+    benchmark(
+        run_check,
+        has_equal_references,
+        student_data,
+        solution_data,
+        range_name(*SIZES[size]),
+        {},
+    )
+
+
+@pytest.mark.parametrize("solution_cache", ["cold", "warm"])
+def test_test_exercise(benchmark, size, student_data, solution_data, solution_cache):
+    if size not in FORMULA_SIZES:
+        pytest.skip("too many formulas")
+    sct_range = range_name(*SIZES[size])
+    sct = [{"range": sct_range, "sct": [single_sct]} for single_sct in SCT]
+    warm_cache = {}
+
+    def grade():
+        return te(
+            sct,
+            student_data,
+            solution_data,
+            solution_cache=warm_cache if solution_cache == "warm" else None,
+        )
+
+    assert benchmark(grade)["correct"]
+
+
+def test_test_exercise_batch(benchmark):
+    solution_data = sheet(100, 10)
+    students = [
+        with_wrong_cell(solution_data, "values", i, i % 10) for i in range(0, 100, 5)
+    ]
+    sct = [{"range": "A1:J100", "sct": [single_sct]} for single_sct in SCT]
+
+    def grade():
+        return list(te_batch(sct, solution_data, students))
+
+    assert len(benchmark(grade)) == len(students)
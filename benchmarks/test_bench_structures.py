@@ -0,0 +1,86 @@
+import pytest
+from copy import deepcopy
+from protowhat.Reporter import Reporter
+from protowhat.Test import TestFail as TF
+
+from benchmarks.generators import (
+    chart,
+    conditional_formats,
+    dashboard,
+    pivot_table,
+    pivot_tables,
+    range_name,
+)
+from sheetwhat.checks import (
+    has_equal_charts,
+    has_equal_conditional_formats,
+    has_equal_pivot,
+)
+from sheetwhat.checks.rules import safe_glom
+from sheetwhat.State import State
+
+
+def run_check(check, student_data, solution_data, sct_range="A1", **kwargs):
+    state = State(student_data, solution_data, sct_range, reporter=Reporter())
+    try:
+        check(state, **kwargs)
+    except TF:
+        pass
+
+
+@pytest.mark.parametrize("n_tables", [1, 100])
+@pytest.mark.parametrize("correct", [True, False], ids=["correct", "one_value_wrong"])
+def test_has_equal_pivot(benchmark, n_tables, correct):
+    n_rows = n_tables // 10 or 1
+    n_columns = n_tables // n_rows
+    solution_data = {"pivotTables": pivot_tables(n_rows, n_columns)}
+    student_data = deepcopy(solution_data)
+    if not correct:
+        student_data["pivotTables"][-1][-1]["values"][-1]["summarizeFunction"] = "?"
+    benchmark(
+        run_check,
+        has_equal_pivot,
+        student_data,
+        solution_data,
+        range_name(n_rows, n_columns),
+    )
+
+
+@pytest.mark.parametrize("n_charts", [1, 20])
+def test_has_equal_charts(benchmark, n_charts):
+    student_data, solution_data = dashboard(n_charts)
+    benchmark(run_check, has_equal_charts, student_data, solution_data, any_order=True)
+
+
+def test_has_equal_charts_wrong_type(benchmark):
+    solution_data = {"charts": [chart(0)]}
+    student_data = {"charts": [chart(1)]}
+    benchmark(run_check, has_equal_charts, student_data, solution_data)
+
+
+@pytest.mark.parametrize("n_rules", [10, 50])
+@pytest.mark.parametrize("any_order", [False, True])
+def test_has_equal_conditional_formats(benchmark, n_rules, any_order):
+    student_data, solution_data = conditional_formats(n_rules)
+    benchmark(
+        run_check,
+        has_equal_conditional_formats,
+        student_data,
+        solution_data,
+        any_order=any_order,
+    )
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "source.startRowIndex",
+        "criteria.1.visibleValues",
+        "missing.path",
+        ("values", ["summarizeFunction"]),
+        ("values", [["summarizeFunction"]]),
+    ],
+    ids=["dotted", "dict_keys", "missing", "mapped", "glom"],
+)
+def test_safe_glom(benchmark, path):
+    benchmark(safe_glom, pivot_table(0), path)
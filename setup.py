@@ -30,6 +30,8 @@ setup(
     version=VERSION,
     packages=["sheetwhat", "sheetwhat.checks"],
     install_requires=REQUIREMENTS,
+    extras_require={"numpy": ["numpy"]},
+    entry_points={"console_scripts": ["sheetwhat = sheetwhat.cli:main"]},
     description="Submission correctness tests for spreadsheets",
     long_description=README,
     long_description_content_type="text/markdown",
@@ -3,24 +3,75 @@ import copy
 
 
 class State(BaseState):
-    def __init__(self, student_data, solution_data, sct_range, reporter):
+    def __init__(
+        self,
+        student_data,
+        solution_data,
+        sct_range,
+        reporter,
+        solution_cache=None,
+        student_cache=None,
+        instrumentation=None,
+    ):
         self.student_data = student_data
         self.solution_data = solution_data
         self.sct_range = sct_range
         self.reporter = reporter
+        self.solution_cache = {} if solution_cache is None else solution_cache
+        self.student_cache = {} if student_cache is None else student_cache
+        # records the checks when set, see sheetwhat.instrumentation
+        self.instrumentation = instrumentation
 
     def do_test(self, feedback_message, highlight=None):
         return self.reporter.do_test(feedback_message)
 
     def to_child(self, student_data, solution_data):
-        """Basic implementation of returning a child state"""
+        """Basic implementation of returning a child state
+
+        The child's data is typically a ``DataOverlay`` on the parent's data,
+        so checks should treat ``student_data`` and ``solution_data`` as read-only.
+        """
 
         child = copy.copy(self)
         child.student_data = student_data
         child.solution_data = solution_data
+        # the child holds different data, so it can't reuse what was derived from ours
+        child.solution_cache = {}
+        child.student_cache = {}
         child.parent = self
         return child
 
+    def solution_cached(self, key, compute):
+        """Return ``compute()``, memoized under ``key`` in the solution cache.
+
+        The solution cache can be shared by all states that are built for the same
+        solution data (see ``test_exercise_batch``), so everything that only
+        depends on the solution is only derived once. Keys should include all
+        parameters that the result depends on, e.g. the field and the range.
+        """
+        return self._cached(self.solution_cache, "solution", key, compute)
+
+    def student_cached(self, key, compute):
+        """Return ``compute()``, memoized under ``key`` in the student cache.
+
+        The student cache lives for one grading run: it is shared by the states of
+        all SCTs that ``test_exercise`` runs on the same submission, so checks on
+        the same range derive things from the student data only once.
+        """
+        return self._cached(self.student_cache, "student", key, compute)
+
+    def _cached(self, cache, cache_name, key, compute):
+        try:
+            result = cache[key]
+        except KeyError:
+            result = cache[key] = compute()
+            if self.instrumentation is not None:
+                self.instrumentation.count_lookup(cache_name, hit=False)
+            return result
+        if self.instrumentation is not None:
+            self.instrumentation.count_lookup(cache_name, hit=True)
+        return result
+
     def to_message_exposed_dict(self):
         """This dictionary is passed through to the message formatter. The fields
         defined in the dictionary can be replaced by values in the state by using
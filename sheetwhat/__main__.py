@@ -0,0 +1,3 @@
+from sheetwhat.cli import main
+
+main()
@@ -1,20 +1,63 @@
-from sheetwhat.checks.check_funcs import (
-    has_code,
-    check_range,
-    has_equal_value,
-    has_equal_formula,
-    has_equal_references,
-    check_function,
-    check_operator,
-)
-from sheetwhat.checks.has_equal_pivot import has_equal_pivot
-from sheetwhat.checks.has_equal_charts import has_equal_charts
-from sheetwhat.checks.has_equal_conditional_formats import has_equal_conditional_formats
-
-# don't import some funcs from protowhat that don't make sense:
-# - check_node, check_edge and has_equal_ast don't work well.
-# - has_parsed_ast not necessary
-# - has_code has its own implementation in sheetwhat
-# - no check_file related functionality
-from protowhat.checks.check_logic import fail, multi, check_not, check_or, check_correct
-from protowhat.checks.check_simple import has_chosen, success_msg
+"""The checks of sheetwhat, loaded from their module when they are first used.
+
+Importing this package is cheap: ``from sheetwhat.checks import has_equal_pivot``
+only imports the modules that ``has_equal_pivot`` needs.
+"""
+
+import sys
+import types
+from importlib import import_module
+
+# module of every check
+_modules = {
+    "has_code": "sheetwhat.checks.check_funcs",
+    "check_range": "sheetwhat.checks.check_funcs",
+    "has_equal_value": "sheetwhat.checks.check_funcs",
+    "has_equal_formula": "sheetwhat.checks.check_funcs",
+    "has_equal_references": "sheetwhat.checks.check_funcs",
+    "check_function": "sheetwhat.checks.check_funcs",
+    "check_operator": "sheetwhat.checks.check_funcs",
+    "has_equal_pivot": "sheetwhat.checks.has_equal_pivot",
+    "has_equal_charts": "sheetwhat.checks.has_equal_charts",
+    "has_equal_conditional_formats": "sheetwhat.checks.has_equal_conditional_formats",
+    # don't import some funcs from protowhat that don't make sense:
+    # - check_node, check_edge and has_equal_ast don't work well.
+    # - has_parsed_ast not necessary
+    # - has_code has its own implementation in sheetwhat
+    # - no check_file related functionality
+    "fail": "protowhat.checks.check_logic",
+    "multi": "protowhat.checks.check_logic",
+    "check_not": "protowhat.checks.check_logic",
+    "check_or": "protowhat.checks.check_logic",
+    "check_correct": "protowhat.checks.check_logic",
+    "has_chosen": "protowhat.checks.check_simple",
+    "success_msg": "protowhat.checks.check_simple",
+}
+
+__all__ = list(_modules)
+
+
+class _ChecksModule(types.ModuleType):
+    # on the class of the module instead of module-level __getattr__ and __dir__
+    # functions, which need Python 3.7
+    def __getattr__(self, name):
+        try:
+            module_name = _modules[name]
+        except KeyError:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        check = getattr(import_module(module_name), name)
+        setattr(self, name, check)
+        return check
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(__all__))
+
+    def __setattr__(self, name, value):
+        # importing e.g. sheetwhat.checks.has_equal_pivot sets the submodule as an
+        # attribute of this package, the check of the same name takes precedence
+        if isinstance(value, types.ModuleType) and _modules.get(name) == value.__name__:
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _ChecksModule
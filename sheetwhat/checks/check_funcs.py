@@ -1,29 +1,49 @@
+from sheetwhat import formulas, vectorized
 from sheetwhat.utils import (
-    crop_by_range,
+    DataOverlay,
     is_empty,
+    is_sparse_view,
+    present_rows,
+    round_value,
     round_array_2d,
     normalize_array_2d,
+    find_mismatches,
+    cell_names,
     map_2d,
+    cells_2d,
+    view_by_range,
     normalize_formula,
 )
-import copy
+import operator
 import re
 
 
 def check_range(state, field, field_msg, missing_msg=None):
 
-    student_field_content = crop_by_range(state.student_data[field], state.sct_range)
-    solution_field_content = crop_by_range(state.solution_data[field], state.sct_range)
+    # a lazy view, built once per submission and once per solution for all checks on it
+    student_field_content = state.student_cached(
+        (field, state.sct_range),
+        lambda: view_by_range(state.student_data[field], state.sct_range),
+    )
+    solution_field_content = state.solution_cached(
+        (field, state.sct_range),
+        lambda: view_by_range(state.solution_data[field], state.sct_range),
+    )
 
-    if is_empty(student_field_content):
+    if state.instrumentation is not None:
+        state.instrumentation.add_cells(student_field_content.n_cells())
+
+    if state.student_cached(
+        (field, state.sct_range, "empty"), lambda: is_empty(student_field_content)
+    ):
         _msg = (missing_msg or "Please fill in a {field_msg} in `{range}`.").format(
             field_msg=field_msg, **state.to_message_exposed_dict()
         )
         state.do_test(_msg)
 
     return state.to_child(
-        {**copy.deepcopy(state.student_data), field: student_field_content},
-        {**copy.deepcopy(state.solution_data), field: solution_field_content},
+        DataOverlay(state.student_data, {field: student_field_content}),
+        DataOverlay(state.solution_data, {field: solution_field_content}),
     )
 
 
@@ -39,7 +59,7 @@ def has_code(state, pattern, fixed=False, incorrect_msg=None, normalize=lambda x
     student_formulas_normalized = map_2d(normalize, child.student_data["formulas"])
     student_matches = map_2d(match, student_formulas_normalized)
 
-    if not all([all(row) for row in student_matches]):
+    if not all(cells_2d(student_matches)):
         _msg = (
             incorrect_msg or "In cell `{range}`, did you use the correct formula?"
         ).format(**state.to_message_exposed_dict())
@@ -52,14 +72,16 @@ def check_function(state, name, missing_msg=None):
     missing_msg = (
         missing_msg or "In cell `{range}`, did you use the `{name}()` function?"
     ).format(name=name, **state.to_message_exposed_dict())
+    child = check_range(state, field="formulas", field_msg="formula")
+
+    name = normalize_formula(name).upper()
+    student_formulas = child.student_data["formulas"]
+    if not all(
+        name in formulas.function_names(formula)
+        for formula in cells_2d(student_formulas)
+    ):
+        child.do_test(missing_msg)
 
-    has_code(
-        state,
-        pattern=name,
-        fixed=True,
-        incorrect_msg=missing_msg,
-        normalize=normalize_formula,
-    )
     # Don't return state; chaining not implemented yet
     return None
 
@@ -68,26 +90,62 @@ def check_operator(state, operator, missing_msg=None):
     missing_msg = (
         missing_msg or "In cell `{range}`, did you use the `{operator}` operator?"
     ).format(operator=operator, **state.to_message_exposed_dict())
-    has_code(
-        state,
-        pattern=operator,
-        fixed=True,
-        incorrect_msg=missing_msg,
-        normalize=normalize_formula,
-    )
+    child = check_range(state, field="formulas", field_msg="formula")
+
+    operator = normalize_formula(operator)
+    student_formulas = child.student_data["formulas"]
+    if not all(
+        operator in formulas.operators(formula)
+        for formula in cells_2d(student_formulas)
+    ):
+        child.do_test(missing_msg)
+
     # Don't return state; chaining not implemented yet
     return None
 
 
-def has_equal_value(state, incorrect_msg=None, ndigits=4):
+def mismatch_message_dict(state, mismatches):
+    """Fields to describe mismatching cells in messages, on top of ``{range}``.
+
+    ``{cell}`` is the first cell that is incorrect, ``{cells}`` lists all of the
+    incorrect cells that were found.
+    """
+    names = cell_names(state.sct_range, mismatches)
+    return {
+        **state.to_message_exposed_dict(),
+        "cell": names[0],
+        "cells": ", ".join(f"`{name}`" for name in names),
+    }
+
+
+def has_equal_value(state, incorrect_msg=None, ndigits=4, max_mismatches=1):
     child = check_range(state, field="values", field_msg="value")
 
-    student_values_rounded = round_array_2d(child.student_data["values"], ndigits)
-    solution_values_rounded = round_array_2d(child.solution_data["values"], ndigits)
+    student_values = child.student_data["values"]
+    solution_values = child.solution_data["values"]
+
+    if vectorized.can_vectorize(student_values, solution_values):
+        solution_grid = state.solution_cached(
+            ("values", state.sct_range, "grid", ndigits),
+            lambda: vectorized.ValueGrid(solution_values, ndigits),
+        )
+        student_grid = vectorized.ValueGrid(student_values, ndigits)
+        mismatches = student_grid.mismatches(solution_grid, limit=max_mismatches)
+    else:
+        solution_values_rounded = state.solution_cached(
+            ("values", state.sct_range, "round", ndigits),
+            lambda: round_array_2d(solution_values, ndigits),
+        )
+        mismatches = find_mismatches(
+            student_values,
+            solution_values_rounded,
+            lambda x, rounded: round_value(x, ndigits) == rounded,
+            limit=max_mismatches,
+        )
 
-    if student_values_rounded != solution_values_rounded:
+    if mismatches:
         _msg = (incorrect_msg or "The value at `{range}` is not correct.").format(
-            **child.to_message_exposed_dict()
+            **mismatch_message_dict(child, mismatches)
         )
 
         child.do_test(_msg)
@@ -95,21 +153,50 @@ def has_equal_value(state, incorrect_msg=None, ndigits=4):
     return state
 
 
-def has_equal_formula(state, incorrect_msg=None, ndigits=4):
+def has_equal_formula(state, incorrect_msg=None, ndigits=4, max_mismatches=1):
     child = check_range(state, field="formulas", field_msg="formula")
 
-    student_formulas_normalized = normalize_array_2d(child.student_data["formulas"])
-    solution_formulas_normalized = normalize_array_2d(child.solution_data["formulas"])
+    solution_formulas_normalized = state.solution_cached(
+        ("formulas", state.sct_range, "normalize"),
+        lambda: normalize_array_2d(child.solution_data["formulas"]),
+    )
+    student_formulas = child.student_data["formulas"]
+    if is_sparse_view(student_formulas):
+        # only the rows with cells are normalized while comparing
+        def equal(formula, normalized):
+            return normalize_formula(formula) == normalized
+
+    else:
+        student_formulas = state.student_cached(
+            ("formulas", state.sct_range, "normalize"),
+            lambda: normalize_array_2d(student_formulas),
+        )
+        equal = operator.eq
+    mismatches = find_mismatches(
+        student_formulas, solution_formulas_normalized, equal, limit=max_mismatches
+    )
 
-    if student_formulas_normalized != solution_formulas_normalized:
+    if mismatches:
         _msg = (
             incorrect_msg or "In cell `{range}`, did you use the correct formula?"
-        ).format(**state.to_message_exposed_dict())
+        ).format(**mismatch_message_dict(state, mismatches))
         child.do_test(_msg)
 
     return state
 
 
+def reference_names(formula):
+    """Normalized references in a formula, also per sheet and per corner of a range."""
+    names = set()
+    for reference in formulas.references(formula):
+        reference = normalize_formula(reference)
+        names.add(reference)
+        sheetless = reference.rsplit("!", 1)[-1]
+        names.add(sheetless)
+        names.update(sheetless.split(":"))
+    return names
+
+
 def has_equal_references(state, absolute=False, incorrect_msg=None):
     child = check_range(state, field="formulas", field_msg="formula")
 
@@ -118,17 +205,27 @@ def has_equal_references(state, absolute=False, incorrect_msg=None):
     else:
         pattern = r"[A-Za-z]+\d+(?:\:[A-Za-z]+\d+)?"
 
-    student_formulas = child.student_data["formulas"]
-    solution_formulas = child.solution_data["formulas"]
+    def solution_references(formula):
+        return [
+            match
+            for reference in formulas.references(formula)
+            for match in re.findall(pattern, reference.rsplit("!", 1)[-1])
+        ]
 
-    for i, student_row in enumerate(student_formulas):
-        for j, student_cell in enumerate(student_row):
-            solution_cell = str(solution_formulas[i][j])
-            student_cell = str(student_cell)
-            solution_references = re.findall(pattern, solution_cell)
+    student_references_2d = state.student_cached(
+        ("formulas", state.sct_range, "reference_names"),
+        lambda: map_2d(reference_names, child.student_data["formulas"]),
+    )
+    solution_references_2d = state.solution_cached(
+        ("formulas", state.sct_range, "references", absolute),
+        lambda: map_2d(solution_references, child.solution_data["formulas"]),
+    )
 
-            for reference in solution_references:
-                if normalize_formula(reference) not in normalize_formula(student_cell):
+    # rows without cells have no references to check
+    for i, student_row in present_rows(student_references_2d).items():
+        for j, student_references in enumerate(student_row):
+            for reference in solution_references_2d[i][j]:
+                if normalize_formula(reference) not in student_references:
                     _msg = (
                         incorrect_msg
                         or (
@@ -0,0 +1,214 @@
+"""Structural diff of the student and solution version of nested JSON.
+
+``diff_structures()`` walks both trees once, in lockstep, and collects a typed
+list of ``Difference`` objects. The structural checks (pivot tables, charts and
+conditional formats) only evaluate the rules on paths where the diff found a
+difference, and map those to messages.
+
+A schema tells the walk how to compare some parts of the trees. It's a nested
+dict with keys (or ``ANY`` for every key or index) that end in ``SET``, to
+compare a list as a set, or in a function that tells if two values are equal::
+
+    {"criteria": {ANY: {"visibleValues": SET}}, "values": {ANY: {"formula": f}}}
+"""
+
+from collections import namedtuple
+
+from sheetwhat.utils import is_empty
+
+# kinds of differences
+MISSING = "missing"  # the solution has a value, the student doesn't
+EXTRA = "extra"  # the student has a value, the solution doesn't
+CHANGED = "changed"  # different values
+LENGTH = "length"  # lists of different lengths, the common elements are compared too
+SET = "set"  # lists with different elements, when compared as sets
+
+# schema key that matches every key of a dict or index of a list
+ANY = object()
+
+# path is a tuple of dict keys and list indices, e.g. ("rows", 0, "sortOrder")
+Difference = namedtuple("Difference", ["kind", "path", "student", "solution"])
+
+
+def as_path(path):
+    """Convert a rule path to a tuple path, e.g. ``"spec.title"``.
+
+    Paths that map over a list, like ``("rows", ["sortOrder"])``, become the path
+    of the list. Other glom specs become the root path.
+    """
+    if isinstance(path, str):
+        return tuple(path.split("."))
+    if isinstance(path, tuple) and len(path) == 2 and isinstance(path[0], str):
+        return as_path(path[0])
+    return ()
+
+
+class StructuralDiff:
+    def __init__(self, student, solution, schema=None):
+        self.differences = []
+        # paths at or above a difference
+        self.differing = set()
+        # differing paths that the walk didn't (fully) descend into
+        self.opaque = set()
+        self._walk((), student, solution, schema)
+
+    def __bool__(self):
+        return len(self.differing) > 0
+
+    def __iter__(self):
+        return iter(self.differences)
+
+    def __len__(self):
+        return len(self.differences)
+
+    def differs(self, path=()):
+        """Whether the student and solution differ at, or below, a path.
+
+        ``path`` is a tuple path or a rule path (see ``as_path()``).
+        """
+        if not isinstance(path, tuple) or not all(
+            isinstance(key, (str, int)) for key in path
+        ):
+            path = as_path(path)
+        if path in self.differing:
+            return True
+        return any(path[:i] in self.opaque for i in range(len(path)))
+
+    def _walk(self, path, student, solution, schema):
+        """Compare the student and solution at a path, return whether they differ."""
+        if student is solution:
+            return False
+
+        start = len(self.differences)
+        descended = False
+        differs = False
+        kind = None
+
+        if callable(schema):
+            if not schema(student, solution):
+                kind = CHANGED
+        elif schema is SET and _is_list(student) and _is_list(solution):
+            if _as_set(student) != _as_set(solution):
+                kind = SET
+        elif isinstance(student, dict) and isinstance(solution, dict):
+            descended = True
+            keys = [*solution, *(key for key in student if key not in solution)]
+            for key in keys:
+                child_path = (*path, key)
+                child_differs = self._walk(
+                    child_path,
+                    student.get(key),
+                    solution.get(key),
+                    _child_schema(schema, key),
+                )
+                if not child_differs and (key in student) != (key in solution):
+                    # a key on one side only, with None on the other
+                    self._add(CHANGED, child_path, student.get(key), solution.get(key))
+                    child_differs = True
+                differs = child_differs or differs
+        elif _is_list(student) and _is_list(solution):
+            descended = True
+            for i, (student_el, solution_el) in enumerate(zip(student, solution)):
+                differs = (
+                    self._walk(
+                        (*path, i), student_el, solution_el, _child_schema(schema, i)
+                    )
+                    or differs
+                )
+            if len(student) != len(solution):
+                kind = LENGTH
+        elif student != solution:
+            kind = CHANGED
+
+        if kind is None and not differs:
+            return False
+
+        student_empty, solution_empty = is_empty(student), is_empty(solution)
+        if student_empty != solution_empty:
+            # explains all differences below
+            del self.differences[start:]
+            kind = MISSING if student_empty else EXTRA
+
+        if kind is not None:
+            self._add(kind, path, student, solution)
+        else:
+            self.differing.add(path)
+        if kind is not None and (not descended or kind == LENGTH):
+            self.opaque.add(path)
+        return True
+
+    def _add(self, kind, path, student, solution):
+        self.differences.append(Difference(kind, path, student, solution))
+        self.differing.add(path)
+
+
+def diff_structures(student, solution, schema=None):
+    """Compare two nested structures of dicts and lists, return a ``StructuralDiff``."""
+    return StructuralDiff(student, solution, schema)
+
+
+# (student index, solution index) pairs, by solution index, the indices of the
+# unmatched student and solution structures, and the solution indices that
+# were matched by fingerprint
+Matching = namedtuple("Matching", ["pairs", "extra", "missing", "exact"])
+
+
+def match_structures(students, solutions, fingerprint, nb_issues):
+    """Match student structures to solution structures, regardless of their order.
+
+    Structures with the same ``fingerprint()`` are matched through a dict, in
+    linear time, so fingerprints should only be equal for structures without
+    issues. Every other solution structure is matched to the remaining student
+    structure with the fewest ``nb_issues(student, solution)``.
+    Returns a ``Matching``.
+    """
+    by_fingerprint = {}
+    for i, student in enumerate(students):
+        by_fingerprint.setdefault(fingerprint(student), []).append(i)
+
+    pairs = []
+    exact = set()
+    unmatched_solutions = []
+    for j, solution in enumerate(solutions):
+        candidates = by_fingerprint.get(fingerprint(solution))
+        if candidates:
+            pairs.append((candidates.pop(0), j))
+            exact.add(j)
+        else:
+            unmatched_solutions.append(j)
+
+    unmatched_students = sorted(
+        i for indices in by_fingerprint.values() for i in indices
+    )
+    missing = []
+    for j in unmatched_solutions:
+        if not unmatched_students:
+            missing.append(j)
+            continue
+        best = min(
+            unmatched_students, key=lambda i: nb_issues(students[i], solutions[j])
+        )
+        unmatched_students.remove(best)
+        pairs.append((best, j))
+
+    return Matching(
+        sorted(pairs, key=lambda pair: pair[1]), unmatched_students, missing, exact
+    )
+
+
+def _is_list(x):
+    return isinstance(x, list)
+
+
+def _as_set(array):
+    try:
+        return set(array)
+    except TypeError:
+        # unhashable elements
+        return array
+
+
+def _child_schema(schema, key):
+    if not isinstance(schema, dict):
+        return None
+    return schema.get(key, schema.get(ANY))
@@ -1,3 +1,8 @@
+import json
+
+from protowhat import selectors
+
+from .diff import diff_structures, match_structures
 from .rules import rule_types, safe_glom
 
 
@@ -17,14 +22,35 @@ def infer_chart_type(chart):
             return chart_type
 
 
-def has_equal_charts(state, extra_msg=None):
-    solution_chart = state.solution_data["charts"][0]
-    if len(state.student_data["charts"]) == 0:
-        state.do_test("Please create a chart.")
-    student_chart = state.student_data["charts"][0]
+def chart_fingerprint(chart):
+    """Hashable summary of everything ``chart_issues()`` compares.
+
+    Charts with the same fingerprint have no issues with each other.
+    """
+    chart_type = infer_chart_type(chart)
+    canonical = {
+        "type": chart_type,
+        "chartType": safe_glom(chart, "spec.basicChart.chartType"),
+        "title": safe_glom(chart, "spec.title"),
+        "subTitle": safe_glom(chart, "spec.subTitle"),
+        "domains": safe_glom(chart, f"spec.{chart_type}.domains"),
+        "series": safe_glom(chart, f"spec.{chart_type}.series"),
+    }
+    return json.dumps(canonical, sort_keys=True, default=repr)
+
+
+def chart_issues(state, student_chart, solution_chart, chart_index=None):
+    """The issues of a student chart, compared to a solution chart.
+
+    The type of the solution chart is cached by ``chart_index``, if it's given.
+    """
+    diff = diff_structures(student_chart, solution_chart)
+    if not diff:
+        return []
+
     issues = []
     bound_rules = {
-        key: RuleClass(student_chart, solution_chart, issues)
+        key: RuleClass(student_chart, solution_chart, issues, diff)
         for key, RuleClass in rule_types.items()
     }
     bound_rules["existence"]("spec.title", "There is no title."),
@@ -33,7 +59,12 @@ def has_equal_charts(state, extra_msg=None):
     bound_rules["equality"]("spec.subTitle", "The subtitle is not correct.")
 
     # Figure out chart type
-    solution_chart_type = infer_chart_type(solution_chart)
+    if chart_index is None:
+        solution_chart_type = infer_chart_type(solution_chart)
+    else:
+        solution_chart_type = state.solution_cached(
+            ("charts", chart_index, "type"), lambda: infer_chart_type(solution_chart)
+        )
 
     bound_rules["existence"](
         f"spec.{solution_chart_type}", "The chart type is not correct."
@@ -65,12 +96,70 @@ def has_equal_charts(state, extra_msg=None):
             f"spec.{solution_chart_type}.series", ("The {ordinal} series is incorrect.")
         )
 
+    return issues
+
+
+def report_chart_issues(state, issues, chart_name="chart"):
     nb_issues = len(issues)
     if nb_issues > 0:
         _issues_msg = "\n".join([f"- {issue}" for issue in issues])
         _msg = (
             f"There {'are' if nb_issues > 1 else 'is'} {nb_issues} "
-            f"issue{'s' if nb_issues > 1 else ''} with the chart:"
+            f"issue{'s' if nb_issues > 1 else ''} with the {chart_name}:"
             f"\n\n{_issues_msg}\n"
         )
         state.do_test(_msg)
+
+
+def has_equal_charts(state, extra_msg=None, chart_index=0, any_order=False):
+    """Check a chart against the solution.
+
+    ``chart_index`` selects the chart to compare on both sides. With
+    ``any_order=True``, every solution chart is matched to a student chart,
+    regardless of their order, and missing and extra charts are reported too.
+    """
+    if any_order:
+        return has_equal_charts_any_order(state)
+
+    solution_chart = state.solution_data["charts"][chart_index]
+    if len(state.student_data["charts"]) <= chart_index:
+        if chart_index == 0:
+            state.do_test("Please create a chart.")
+        state.do_test(f"Please create a {selectors.get_ord(chart_index + 1)} chart.")
+    student_chart = state.student_data["charts"][chart_index]
+
+    issues = chart_issues(state, student_chart, solution_chart, chart_index)
+    chart_name = "chart"
+    if chart_index > 0:
+        chart_name = f"{selectors.get_ord(chart_index + 1)} chart"
+    report_chart_issues(state, issues, chart_name)
+
+
+def has_equal_charts_any_order(state):
+    student_charts = state.student_data["charts"]
+    solution_charts = state.solution_data["charts"]
+    if len(student_charts) == 0:
+        state.do_test("Please create a chart.")
+
+    matching = match_structures(
+        student_charts,
+        solution_charts,
+        chart_fingerprint,
+        lambda student, solution: len(chart_issues(state, student, solution)),
+    )
+    matched = {j: i for i, j in matching.pairs}
+    for j, solution_chart in enumerate(solution_charts):
+        ordinal = selectors.get_ord(j + 1)
+        if j in matching.missing:
+            state.do_test(f"The {ordinal} chart is missing.")
+        if j in matching.exact:
+            continue
+        issues = chart_issues(state, student_charts[matched[j]], solution_chart, j)
+        report_chart_issues(state, issues, f"{ordinal} chart")
+
+    extra = matching.extra
+    if extra:
+        state.do_test(
+            f"There {'are' if len(extra) > 1 else 'is'} {len(extra)} "
+            f"chart{'s' if len(extra) > 1 else ''} too many."
+        )
@@ -1,53 +1,133 @@
-from .rules import rule_types
+import json
+
+from sheetwhat.utils import is_empty
+from .diff import diff_structures, match_structures
+from .rules import rule_types, safe_glom
 from protowhat import selectors
 
 
-def has_equal_conditional_formats(state, absolute=False, incorrect_msg=None):
-    student_cond_formats = state.student_data["conditionalFormats"]
-    solution_cond_formats = state.solution_data["conditionalFormats"]
+def cond_format_issues(student_cond_format, solution_cond_format, ordinal, issues):
+    """Append the issues of a student conditional format rule to ``issues``."""
+    diff = diff_structures(student_cond_format, solution_cond_format)
+    if not diff:
+        return issues
 
-    issues = []
+    bound_rules = {
+        key: RuleClass(student_cond_format, solution_cond_format, issues, diff)
+        for key, RuleClass in rule_types.items()
+    }
 
-    for i, (student_cond_format, solution_cond_format) in enumerate(
-        zip(student_cond_formats, solution_cond_formats)
-    ):
-        ordinal = selectors.get_ord(i + 1)
-        bound_rules = {
-            key: RuleClass(student_cond_format, solution_cond_format, issues)
-            for key, RuleClass in rule_types.items()
-        }
+    bound_rules["existence"](
+        "booleanRule", f"The {ordinal} rule is incorrect, expected single color."
+    )
+    bound_rules["existence"](
+        "gradientRule", f"The {ordinal} rule is incorrect, expected color scale."
+    )
+    if len(issues) == 0:
+        bound_rules["equality"](
+            "ranges", f"There ranges of the {ordinal} rule are incorrect."
+        )
 
-        bound_rules["existence"](
-            "booleanRule", f"The {ordinal} rule is incorrect, expected single color."
+        bound_rules["equality"](
+            "booleanRule.condition",
+            f"There condition of the {ordinal} rule is incorrect.",
         )
-        bound_rules["existence"](
-            "gradientRule", f"The {ordinal} rule is incorrect, expected color scale."
+        bound_rules["equality"](
+            "booleanRule.format", f"There format of the {ordinal} rule is incorrect."
         )
-        if len(issues) == 0:
-            bound_rules["equality"](
-                "ranges", f"There ranges of the {ordinal} rule are incorrect."
-            )
 
-            bound_rules["equality"](
-                "booleanRule.condition",
-                f"There condition of the {ordinal} rule is incorrect.",
-            )
-            bound_rules["equality"](
-                "booleanRule.format",
-                f"There format of the {ordinal} rule is incorrect.",
-            )
+        bound_rules["equality"](
+            "gradientRule.minpoint",
+            f"There minpoint of the {ordinal} rule is incorrect.",
+        )
+        bound_rules["equality"](
+            "gradientRule.midpoint",
+            f"There minpoint of the {ordinal} rule is incorrect.",
+        )
+        bound_rules["equality"](
+            "gradientRule.maxpoint",
+            f"There maxpoint of the {ordinal} rule is incorrect.",
+        )
+    return issues
+
+
+# the paths that cond_format_issues() compares
+FINGERPRINT_PATHS = [
+    "ranges",
+    "booleanRule.condition",
+    "booleanRule.format",
+    "gradientRule.minpoint",
+    "gradientRule.midpoint",
+    "gradientRule.maxpoint",
+]
 
-            bound_rules["equality"](
-                "gradientRule.minpoint",
-                f"There minpoint of the {ordinal} rule is incorrect.",
+
+def cond_format_fingerprint(cond_format):
+    """Hashable summary of everything ``cond_format_issues()`` compares.
+
+    Rules with the same fingerprint have no issues with each other.
+    """
+    canonical = {
+        "booleanRule": is_empty(safe_glom(cond_format, "booleanRule")),
+        "gradientRule": is_empty(safe_glom(cond_format, "gradientRule")),
+        **{path: safe_glom(cond_format, path) for path in FINGERPRINT_PATHS},
+    }
+    return json.dumps(canonical, sort_keys=True, default=repr)
+
+
+def match_cond_formats(student_cond_formats, solution_cond_formats):
+    """Match student rules to solution rules, see ``match_structures()``."""
+    return match_structures(
+        student_cond_formats,
+        solution_cond_formats,
+        cond_format_fingerprint,
+        lambda student, solution: len(cond_format_issues(student, solution, "", [])),
+    )
+
+
+def has_equal_conditional_formats(
+    state, absolute=False, incorrect_msg=None, any_order=False
+):
+    """Check the conditional formatting rules against the solution.
+
+    By default, rules are compared by position. With ``any_order=True``, student
+    rules are matched to solution rules regardless of their order, and missing
+    and extra rules are reported too.
+    """
+    student_cond_formats = state.student_data["conditionalFormats"]
+    solution_cond_formats = state.solution_data["conditionalFormats"]
+
+    issues = []
+
+    if any_order:
+        matching = match_cond_formats(student_cond_formats, solution_cond_formats)
+        for i, j in matching.pairs:
+            if j in matching.exact:
+                continue
+            cond_format_issues(
+                student_cond_formats[i],
+                solution_cond_formats[j],
+                selectors.get_ord(j + 1),
+                issues,
             )
-            bound_rules["equality"](
-                "gradientRule.midpoint",
-                f"There minpoint of the {ordinal} rule is incorrect.",
+        issues.extend(
+            f"The {selectors.get_ord(j + 1)} rule is missing." for j in matching.missing
+        )
+        extra = matching.extra
+        if extra:
+            issues.append(
+                f"There {'are' if len(extra) > 1 else 'is'} {len(extra)} "
+                f"rule{'s' if len(extra) > 1 else ''} too many."
             )
-            bound_rules["equality"](
-                "gradientRule.maxpoint",
-                f"There maxpoint of the {ordinal} rule is incorrect.",
+    else:
+        for i, (student_cond_format, solution_cond_format) in enumerate(
+            zip(student_cond_formats, solution_cond_formats)
+        ):
+            cond_format_issues(
+                student_cond_format,
+                solution_cond_format,
+                selectors.get_ord(i + 1),
+                issues,
             )
 
     nb_issues = len(issues)
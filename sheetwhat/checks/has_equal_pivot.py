@@ -1,10 +1,207 @@
+from collections import namedtuple
+
 from sheetwhat.checks import check_range
-from sheetwhat.utils import dict_keys, normalize_formula
+from sheetwhat.utils import normalize_formula
+
+from .diff import ANY, SET, as_path, diff_structures
+from .rules import rule_types, compile_path
+
+
+def equal_formulas(x, y):
+    return normalize_formula(x) == normalize_formula(y)
+
+
+# name, rule type, path, message and extra arguments of every rule, in order
+PIVOT_RULES = [
+    ("rows_existence", "existence", "rows", "There are no rows."),
+    ("columns_existence", "existence", "columns", "There are no columns."),
+    ("values_existence", "existence", "values", "There are no values."),
+    ("criteria_existence", "existence", "criteria", "There are no filters."),
+    (
+        "rows_over_existence",
+        "over_existence",
+        "rows",
+        "There are rows but there shouldn't be.",
+    ),
+    (
+        "columns_over_existence",
+        "over_existence",
+        "columns",
+        "There are columns but there shouldn't be.",
+    ),
+    (
+        "values_over_existence",
+        "over_existence",
+        "values",
+        "There are values but there shouldn't be.",
+    ),
+    ("source", "equality", "source", "The source data is incorrect."),
+    (
+        "rows_sort_order",
+        "array_equality",
+        ("rows", ["sortOrder"]),
+        (
+            "Inside rows, expected the {ordinal} sort order to be "
+            "`{expected}`, but got `{actual}`"
+        ),
+    ),
+    (
+        "columns_sort_order",
+        "array_equality",
+        ("columns", ["sortOrder"]),
+        (
+            "Inside columns, expected the {ordinal} sort order to be "
+            "`{expected}`, but got `{actual}`"
+        ),
+    ),
+    (
+        "rows_value_bucket",
+        "array_equality",
+        ("rows", ["valueBucket"]),
+        (
+            "Inside rows, expected the {ordinal} sort group to be "
+            "`{expected}`, but got `{actual}`"
+        ),
+    ),
+    (
+        "columns_value_bucket",
+        "array_equality",
+        ("columns", ["valueBucket"]),
+        (
+            "Inside columns, expected the {ordinal} sort group to be "
+            "`{expected}`, but got `{actual}`"
+        ),
+    ),
+    (
+        "rows_source_column",
+        "array_equality",
+        ("rows", ["sourceColumnOffset"]),
+        "Inside rows, the {ordinal} grouping variable is incorrect.",
+    ),
+    (
+        "columns_source_column",
+        "array_equality",
+        ("columns", ["sourceColumnOffset"]),
+        "Inside columns, the {ordinal} grouping variable is incorrect.",
+    ),
+    (
+        "rows_show_totals",
+        "array_equality",
+        ("rows", ["showTotals"]),
+        "Inside rows, the {ordinal} totals are not showing.",
+    ),
+    (
+        "columns_show_totals",
+        "array_equality",
+        ("columns", ["showTotals"]),
+        "Inside columns, the {ordinal} totals are not showing.",
+    ),
+    (
+        "values_summarize_function",
+        "array_equality",
+        ("values", ["summarizeFunction"]),
+        (
+            "Inside values, expected the {ordinal} summarize function "
+            "to be `{expected}`, but got `{actual}`."
+        ),
+    ),
+    (
+        "values_display_type",
+        "array_equality",
+        ("values", ["calculatedDisplayType"]),
+        (
+            "Inside values, expected the {ordinal} display type "
+            "to be `{expected}`, but got `{actual}`."
+        ),
+    ),
+    (
+        "values_length",
+        "array_equal_length",
+        "values",
+        "The number of values is incorrect. Expected {expected}, but got {actual}.",
+    ),
+    (
+        "rows_length",
+        "array_equal_length",
+        "rows",
+        "The number of rows is incorrect. Expected {expected}, but got {actual}.",
+    ),
+    (
+        "columns_length",
+        "array_equal_length",
+        "columns",
+        "The number of columns is incorrect. Expected {expected}, but got {actual}.",
+    ),
+    (
+        "criteria_keys",
+        "dict_key_equality",
+        "criteria",
+        "The rows or columns used in the filter are incorrect.",
+    ),
+    (
+        "criteria_visible_values",
+        "keyed_set_equality",
+        "criteria",
+        "The filtered out values are incorrect.",
+        "visibleValues",
+    ),
+    (
+        "values_formula",
+        "array_equality",
+        ("values", ["formula"]),
+        "The {ordinal} value does not contain the correct calculated field.",
+        equal_formulas,
+    ),
+]
+
+# how the structural diff compares the parts that rules don't compare exactly
+PIVOT_SCHEMA = {
+    "criteria": {ANY: {"visibleValues": SET}},
+    "values": {ANY: {"formula": equal_formulas}},
+}
+
+PivotStep = namedtuple(
+    "PivotStep", ["name", "diff_path", "get", "check", "message", "args"]
+)
 
-from .rules import rule_types, safe_glom
+# compiled once: the rule to check for every step, in order
+PIVOT_STEPS = [
+    PivotStep(
+        name,
+        as_path(path),
+        compile_path(path),
+        rule_types[rule_type].check,
+        message,
+        tuple(args),
+    )
+    for name, rule_type, path, message, *args in PIVOT_RULES
+]
+PIVOT_RULE_NAMES = [step.name for step in PIVOT_STEPS]
 
 
-def has_equal_pivot(state, extra_msg=None):
+def select_steps(rules=None, skip_rules=None):
+    selected = set(PIVOT_RULE_NAMES if rules is None else rules)
+    skipped = set(skip_rules or [])
+    unknown = (selected | skipped) - set(PIVOT_RULE_NAMES)
+    if unknown:
+        raise ValueError(
+            f"Unknown pivot table rules: {', '.join(sorted(unknown))}. "
+            f"Choose from {', '.join(PIVOT_RULE_NAMES)}."
+        )
+    return [
+        step
+        for step in PIVOT_STEPS
+        if step.name in selected and step.name not in skipped
+    ]
+
+
+def has_equal_pivot(state, extra_msg=None, rules=None, skip_rules=None):
+    """Check the pivot tables in a range against the solution.
+
+    ``rules`` limits the checks to the named rules, ``skip_rules`` disables
+    some of them; the names are listed in ``PIVOT_RULE_NAMES``.
+    """
+    steps = select_steps(rules, skip_rules)
     child = check_range(state, field="pivotTables", field_msg="pivot table")
 
     student_pivot_tables = child.student_data["pivotTables"]
@@ -13,124 +210,24 @@ def has_equal_pivot(state, extra_msg=None):
     for i, student_row in enumerate(student_pivot_tables):
         for j, student_pivot_table in enumerate(student_row):
             solution_pivot_table = solution_pivot_tables[i][j]
-            issues = []
-            bound_rules = {
-                key: RuleClass(student_pivot_table, solution_pivot_table, issues)
-                for key, RuleClass in rule_types.items()
-            }
-
-            bound_rules["existence"]("rows", "There are no rows."),
-            bound_rules["existence"]("columns", "There are no columns.")
-            bound_rules["existence"]("values", "There are no values.")
-            bound_rules["existence"]("criteria", "There are no filters.")
-            bound_rules["over_existence"](
-                "rows", "There are rows but there shouldn't be."
-            ),
-            bound_rules["over_existence"](
-                "columns", "There are columns but there shouldn't be."
-            )
-            bound_rules["over_existence"](
-                "values", "There are values but there shouldn't be."
-            )
-            bound_rules["equality"]("source", "The source data is incorrect.")
-            bound_rules["array_equality"](
-                ("rows", ["sortOrder"]),
-                (
-                    "Inside rows, expected the {ordinal} sort order to be "
-                    "`{expected}`, but got `{actual}`"
-                ),
-            )
-            bound_rules["array_equality"](
-                ("columns", ["sortOrder"]),
-                (
-                    "Inside columns, expected the {ordinal} sort order to be "
-                    "`{expected}`, but got `{actual}`"
-                ),
-            )
-            bound_rules["array_equality"](
-                ("rows", ["valueBucket"]),
-                (
-                    "Inside rows, expected the {ordinal} sort group to be "
-                    "`{expected}`, but got `{actual}`"
-                ),
-            )
-            bound_rules["array_equality"](
-                ("columns", ["valueBucket"]),
-                (
-                    "Inside columns, expected the {ordinal} sort group to be "
-                    "`{expected}`, but got `{actual}`"
-                ),
-            )
-            bound_rules["array_equality"](
-                ("rows", ["sourceColumnOffset"]),
-                ("Inside rows, the {ordinal} grouping variable is incorrect."),
-            )
-            bound_rules["array_equality"](
-                ("columns", ["sourceColumnOffset"]),
-                ("Inside columns, the {ordinal} grouping variable is incorrect."),
-            )
-            bound_rules["array_equality"](
-                ("rows", ["showTotals"]),
-                ("Inside rows, the {ordinal} totals are not showing."),
-            )
-            bound_rules["array_equality"](
-                ("columns", ["showTotals"]),
-                ("Inside columns, the {ordinal} totals are not showing."),
-            )
-            bound_rules["array_equality"](
-                ("values", ["summarizeFunction"]),
-                (
-                    "Inside values, expected the {ordinal} summarize function "
-                    "to be `{expected}`, but got `{actual}`."
-                ),
-            )
-            bound_rules["array_equality"](
-                ("values", ["calculatedDisplayType"]),
-                (
-                    "Inside values, expected the {ordinal} display type "
-                    "to be `{expected}`, but got `{actual}`."
-                ),
-            )
-            bound_rules["array_equal_length"](
-                "values",
-                (
-                    "The number of values is incorrect. "
-                    "Expected {expected}, but got {actual}."
-                ),
-            )
-            bound_rules["array_equal_length"](
-                "rows",
-                (
-                    "The number of rows is incorrect. "
-                    "Expected {expected}, but got {actual}."
-                ),
-            )
-            bound_rules["array_equal_length"](
-                "columns",
-                (
-                    "The number of columns is incorrect. "
-                    "Expected {expected}, but got {actual}."
-                ),
+            diff = diff_structures(
+                student_pivot_table, solution_pivot_table, PIVOT_SCHEMA
             )
+            if not diff:
+                continue
 
-            bound_rules["dict_key_equality"](
-                "criteria", "The rows or columns used in the filter are incorrect."
-            )
-            for key in dict_keys(
-                safe_glom(solution_pivot_table, "criteria"),
-                safe_glom(student_pivot_table, "criteria"),
-            ):
-                bound_rules["set_equality"](
-                    f"criteria.{key}.visibleValues",
-                    "The filtered out values are incorrect.",
+            issues = []
+            for step in steps:
+                if not diff.differs(step.diff_path):
+                    continue
+                step.check(
+                    step.get(student_pivot_table),
+                    step.get(solution_pivot_table),
+                    step.message,
+                    issues,
+                    *step.args
                 )
 
-            bound_rules["array_equality"](
-                ("values", ["formula"]),
-                "The {ordinal} value does not contain the correct calculated field.",
-                lambda x, y: normalize_formula(x) == normalize_formula(y),
-            )
-
             nb_issues = len(issues)
             if nb_issues > 0:
                 _issues_msg = "\n".join([f"- {issue}" for issue in issues])
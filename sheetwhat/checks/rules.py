@@ -1,8 +1,8 @@
-import glom
 import functools
 from sheetwhat.utils import is_empty, dict_keys, normalize_formula
 from protowhat import selectors
 
+
 # Supercharge path with appropriate coalesce at every level
 # E.g.
 #  deep_coalesce("path", None) => Coalesce("path", default=None)
@@ -10,26 +10,180 @@ from protowhat import selectors
 #    Coalesce((Coalesce("path", default=None),), default=None)
 # etc. (tuples and lists work analogously)
 def deep_coalesce(path, default):
+    import glom
+
     if isinstance(path, (tuple, list)):
         path = type(path)(deep_coalesce(p, default) for p in path)
     return glom.Coalesce(path, default=default)
 
 
+def glom_path(obj, path, fallback):
+    """Resolve a path with glom, e.g. for paths that ``resolve()`` can't handle.
+
+    glom is only imported here, as most paths are resolved without it.
+    """
+    import glom
+
+    return glom.glom(obj, compile_spec(path, fallback))
+
+
+# number of compiled specs that are kept; some paths are built from the data,
+# e.g. by KeyedSetEqualityRule, so the number of distinct paths isn't bounded
+MAX_SPECS = 1024
+
+
+def _freeze(path):
+    if isinstance(path, (tuple, list)):
+        return (type(path), tuple(_freeze(p) for p in path))
+    return path
+
+
+def _thaw(frozen_path):
+    if isinstance(frozen_path, tuple):
+        path_type, parts = frozen_path
+        return path_type(_thaw(p) for p in parts)
+    return frozen_path
+
+
+@functools.lru_cache(maxsize=MAX_SPECS)
+def _compile_frozen_spec(frozen_path, default):
+    return deep_coalesce(_thaw(frozen_path), default)
+
+
+def compile_spec(path, default):
+    """Return ``deep_coalesce(path, default)``, building it only once per path.
+
+    Only the ``MAX_SPECS`` most recently used specs are kept.
+    """
+    try:
+        return _compile_frozen_spec(_freeze(path), default)
+    except TypeError:
+        # unhashable default
+        return deep_coalesce(path, default)
+
+
+_unresolved = object()
+
+
+def _resolve_keys(obj, keys, fallback):
+    for key in keys:
+        if obj is None:
+            return fallback
+        if not isinstance(obj, dict):
+            return _unresolved
+        obj = obj.get(key, _unresolved)
+        if obj is _unresolved:
+            return fallback
+    return obj
+
+
+def _resolve_mapped(obj, keys, element_keys, fallback):
+    array = _resolve_keys(obj, keys, fallback)
+    if array is None:
+        return fallback
+    if not isinstance(array, list):
+        return _unresolved
+    elements = [_resolve_keys(element, element_keys, fallback) for element in array]
+    if any(element is _unresolved for element in elements):
+        return _unresolved
+    return elements
+
+
+def resolve(obj, path, fallback):
+    """Resolve the simple paths that the checks use without glom.
+
+    Handles dotted paths through dicts, e.g. ``"spec.title"``, and paths that
+    map a dotted path over a list, e.g. ``("rows", ["sortOrder"])``.
+    Returns ``_unresolved`` when glom is needed to get the same result.
+    """
+    if isinstance(path, str):
+        return _resolve_keys(obj, path.split("."), fallback)
+    if _is_mapped_path(path):
+        return _resolve_mapped(obj, path[0].split("."), path[1][0].split("."), fallback)
+    return _unresolved
+
+
 def safe_glom(obj, path, fallback=None):
-    return glom.glom(obj, deep_coalesce(path, fallback))
+    result = resolve(obj, path, fallback)
+    if result is _unresolved:
+        result = glom_path(obj, path, fallback)
+    return result
+
+
+def compile_path(path, fallback=None):
+    """Return a function that does ``safe_glom(obj, path, fallback)``.
+
+    The path is inspected once, so this is faster for paths that are
+    resolved over and over, like the paths of the pivot table rules.
+    """
+    if isinstance(path, str):
+        keys = tuple(path.split("."))
+        resolve_path = functools.partial(_resolve_keys, keys=keys, fallback=fallback)
+    elif _is_mapped_path(path):
+        resolve_path = functools.partial(
+            _resolve_mapped,
+            keys=tuple(path[0].split(".")),
+            element_keys=tuple(path[1][0].split(".")),
+            fallback=fallback,
+        )
+    else:
+        return functools.partial(glom_path, path=path, fallback=fallback)
+
+    def get(obj):
+        result = resolve_path(obj)
+        if result is _unresolved:
+            result = glom_path(obj, path, fallback)
+        return result
+
+    return get
+
+
+def _is_mapped_path(path):
+    return (
+        isinstance(path, tuple)
+        and len(path) == 2
+        and isinstance(path[0], str)
+        and isinstance(path[1], list)
+        and len(path[1]) == 1
+        and isinstance(path[1][0], str)
+    )
 
 
 class Rule:
-    def __init__(self, student_structure, solution_structure, issues):
+    """Compares the student and solution structure at a path, collecting issues.
+
+    Bound rules are called with a path and a message. The comparison itself is
+    done by ``check()``, on values that are already resolved, so it can also be
+    used on its own (see ``has_equal_pivot``).
+    Given the ``StructuralDiff`` of both structures, the rule is skipped for
+    paths without differences: no rule reports issues on equal values.
+    """
+
+    def __init__(self, student_structure, solution_structure, issues, diff=None):
         self.student_structure = student_structure
         self.solution_structure = solution_structure
         self.issues = issues
+        self.diff = diff
+
+    def __call__(self, path, message, *args):
+        if self.diff is not None and not self.diff.differs(path):
+            return
+        self.check(
+            safe_glom(self.student_structure, path),
+            safe_glom(self.solution_structure, path),
+            message,
+            self.issues,
+            *args
+        )
+
+
+def equal(x, y):
+    return x == y
 
 
 class ArrayEqualityRule(Rule):
-    def __call__(self, path, message, equal_func=lambda x, y: x == y):
-        solution_array = safe_glom(self.solution_structure, path)
-        student_array = safe_glom(self.student_structure, path)
+    @staticmethod
+    def check(student_array, solution_array, message, issues, equal_func=equal):
         if not isinstance(student_array, list):
             return
         if not isinstance(solution_array, list):
@@ -41,7 +195,7 @@ class ArrayEqualityRule(Rule):
                 mismatch_reducer, enumerate(matches), []
             )
 
-            self.issues.extend(
+            issues.extend(
                 [
                     message.format(
                         ordinal=selectors.get_ord(i + 1),
@@ -54,9 +208,8 @@ class ArrayEqualityRule(Rule):
 
 
 class ArrayEqualLengthRule(Rule):
-    def __call__(self, path, message):
-        solution_array = safe_glom(self.solution_structure, path)
-        student_array = safe_glom(self.student_structure, path)
+    @staticmethod
+    def check(student_array, solution_array, message, issues):
         if not isinstance(student_array, list):
             return
         if not isinstance(solution_array, list) or len(solution_array) == 0:
@@ -64,21 +217,20 @@ class ArrayEqualLengthRule(Rule):
         solution_array_len = len(solution_array)
         student_array_len = len(student_array)
         if solution_array_len != student_array_len:
-            self.issues.append(
+            issues.append(
                 message.format(expected=solution_array_len, actual=student_array_len)
             )
 
 
 class DictKeyEqualityRule(Rule):
-    def __call__(self, path, message):
-        solution_dict = safe_glom(self.solution_structure, path)
-        student_dict = safe_glom(self.student_structure, path)
+    @staticmethod
+    def check(student_dict, solution_dict, message, issues):
         if not isinstance(student_dict, dict) or not isinstance(solution_dict, dict):
             return
         solution_key_set = set(solution_dict.keys())
         student_key_set = set(student_dict.keys())
         if solution_key_set != student_key_set:
-            self.issues.append(
+            issues.append(
                 message.format(
                     solution_keys=solution_key_set, student_keys=student_key_set
                 )
@@ -86,41 +238,50 @@ class DictKeyEqualityRule(Rule):
 
 
 class EqualityRule(Rule):
-    def __call__(self, path, message):
-        solution_field = safe_glom(self.solution_structure, path)
-        student_field = safe_glom(self.student_structure, path)
+    @staticmethod
+    def check(student_field, solution_field, message, issues):
         if solution_field != student_field:
-            self.issues.append(
-                message.format(expected=solution_field, actual=student_field)
-            )
+            issues.append(message.format(expected=solution_field, actual=student_field))
 
 
 class ExistenceRule(Rule):
-    def __call__(self, path, message):
-        if not is_empty(safe_glom(self.solution_structure, path)) and is_empty(
-            safe_glom(self.student_structure, path)
-        ):
-            self.issues.append(message)
+    @staticmethod
+    def check(student_field, solution_field, message, issues):
+        if is_empty(student_field) and not is_empty(solution_field):
+            issues.append(message)
 
 
 class OverExistenceRule(Rule):
-    def __call__(self, path, message):
-        if is_empty(safe_glom(self.solution_structure, path)) and not is_empty(
-            safe_glom(self.student_structure, path)
-        ):
-            self.issues.append(message)
+    @staticmethod
+    def check(student_field, solution_field, message, issues):
+        if is_empty(solution_field) and not is_empty(student_field):
+            issues.append(message)
 
 
 class SetEqualityRule(Rule):
-    def __call__(self, path, message):
-        solution_array = safe_glom(self.solution_structure, path)
-        student_array = safe_glom(self.student_structure, path)
+    @staticmethod
+    def check(student_array, solution_array, message, issues):
         if not isinstance(student_array, list) or not isinstance(solution_array, list):
             return
         solution_set = set(solution_array)
         student_set = set(student_array)
         if solution_set != student_set:
-            self.issues.append(message)
+            issues.append(message)
+
+
+class KeyedSetEqualityRule(Rule):
+    """Set equality of ``subpath`` in every value of a dict, e.g. for
+    ``criteria.{column}.visibleValues`` of pivot tables."""
+
+    @staticmethod
+    def check(student_dict, solution_dict, message, issues, subpath):
+        for key in dict_keys(solution_dict, student_dict):
+            SetEqualityRule.check(
+                safe_glom(student_dict, f"{key}.{subpath}"),
+                safe_glom(solution_dict, f"{key}.{subpath}"),
+                message,
+                issues,
+            )
 
 
 rule_types = {
@@ -129,6 +290,7 @@ rule_types = {
     "dict_key_equality": DictKeyEqualityRule,
     "equality": EqualityRule,
     "existence": ExistenceRule,
+    "keyed_set_equality": KeyedSetEqualityRule,
     "over_existence": OverExistenceRule,
     "set_equality": SetEqualityRule,
 }
@@ -0,0 +1,236 @@
+"""The ``sheetwhat`` command.
+
+``sheetwhat grade`` grades submissions in newline-delimited JSON, e.g. to replay
+production traffic offline::
+
+    sheetwhat grade submissions.jsonl -o payloads.jsonl -j 8
+
+Every line holds an object with ``sct``, ``student_data`` and the solution:
+either ``solution_data``, or ``solution``, the path of a solution file relative to
+``--solutions`` (and not outside of it). A solution file holds an exercise in JSON
+(``sct``, ``solution_data`` and optionally ``success_msg``), or a prepared
+solution (see ``sheetwhat.prepared``), and is loaded once. ``sct`` and
+``success_msg`` on a line take precedence over the ones in the solution file, and
+an ``id`` on a line is copied to its payload.
+
+A payload is written for every line, in the order of the input, as soon as it's
+graded; a line that can't be graded gets an error payload. Only ``--window``
+lines are read ahead of the output, so memory stays flat for any input size.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from sheetwhat.parallel import error_payload
+
+# number of solution files that stay loaded in a grading process
+MAX_SOLUTIONS = 64
+
+# loaded solution files by path, least recently used first
+_solutions = OrderedDict()
+
+
+def load_solution_file(path):
+    """The SCT, solution data, solution cache and success message of a solution file.
+
+    The solution cache is shared by all submissions that refer to the file.
+    """
+    solution = _solutions.get(path)
+    if solution is not None:
+        _solutions.move_to_end(path)
+        return solution
+
+    if path.endswith(".json"):
+        from sheetwhat.sheet import to_sheet
+
+        with open(path, encoding="utf-8") as fp:
+            exercise = json.load(fp)
+        solution = {
+            "sct": exercise.get("sct"),
+            "solution_data": to_sheet(exercise["solution_data"]),
+            "solution_cache": {},
+            "success_msg": exercise.get("success_msg"),
+        }
+    else:
+        from sheetwhat.prepared import load_solution
+
+        prepared = load_solution(path)
+        solution = {
+            "sct": prepared.sct,
+            "solution_data": prepared.solution_data,
+            "solution_cache": prepared.solution_cache,
+            "success_msg": None,
+        }
+
+    _solutions[path] = solution
+    if len(_solutions) > MAX_SOLUTIONS:
+        _solutions.popitem(last=False)
+    return solution
+
+
+def solution_path(solutions_dir, path):
+    """The real path of a solution file, which has to be in ``solutions_dir``.
+
+    Prepared solutions are unpickled, so a line must not load any other file.
+    """
+    root = os.path.realpath(solutions_dir)
+    real_path = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, real_path]) != root:
+        raise ValueError(f"The solution {path!r} is not in the solutions directory.")
+    return real_path
+
+
+def grade_line(line, solutions_dir="."):
+    """Grade the submission on a line of JSON, and return its payload."""
+    from sheetwhat.test_exercise import test_exercise
+
+    submission = None
+    try:
+        submission = json.loads(line)
+        if "solution" in submission:
+            solution = load_solution_file(
+                solution_path(solutions_dir, submission["solution"])
+            )
+        else:
+            solution = {
+                "solution_data": submission["solution_data"],
+                "solution_cache": None,
+            }
+        payload = test_exercise(
+            submission.get("sct", solution.get("sct")),
+            submission["student_data"],
+            solution["solution_data"],
+            success_msg=submission.get("success_msg", solution.get("success_msg")),
+            solution_cache=solution["solution_cache"],
+        )
+    except Exception as e:
+        payload = error_payload(e)
+
+    if isinstance(submission, dict) and "id" in submission:
+        payload = {"id": submission["id"], **payload}
+    return payload
+
+
+def grade_lines(lines, solutions_dir=".", jobs=1, window=None):
+    """Grade the submissions on ``lines`` of JSON, and yield their payloads in order.
+
+    With more than one job, the lines are graded in a process pool, with at most
+    ``window`` lines (by default 4 per job) read ahead of the payloads yielded.
+    Blank lines are skipped.
+    """
+    lines = (line for line in lines if line.strip())
+    if jobs == 1:
+        for line in lines:
+            yield grade_line(line, solutions_dir)
+        return
+
+    window = window or 4 * jobs
+    executor = ProcessPoolExecutor(max_workers=jobs)
+    pending = deque()
+    try:
+        for line in lines:
+            try:
+                future = executor.submit(grade_line, line, solutions_dir)
+            except BrokenProcessPool:
+                # a worker died, e.g. out of memory: the lines that were being
+                # graded get an error payload, the others go to a new pool
+                executor.shutdown()
+                executor = ProcessPoolExecutor(max_workers=jobs)
+                future = executor.submit(grade_line, line, solutions_dir)
+            pending.append(future)
+            if len(pending) >= window:
+                yield _result(pending.popleft())
+        while pending:
+            yield _result(pending.popleft())
+    finally:
+        executor.shutdown()
+
+
+def _result(future):
+    try:
+        return future.result()
+    except Exception as e:
+        return error_payload(e)
+
+
+@contextlib.contextmanager
+def _open(path, mode, default):
+    if path is None or path == "-":
+        yield default
+    else:
+        with open(path, mode, encoding="utf-8") as fp:
+            yield fp
+
+
+def grade(args):
+    with _open(args.input, "r", sys.stdin) as lines:
+        with _open(args.output, "w", sys.stdout) as out:
+            payloads = grade_lines(
+                lines, solutions_dir=args.solutions, jobs=args.jobs, window=args.window
+            )
+            for payload in payloads:
+                out.write(json.dumps(payload))
+                out.write("\n")
+                out.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="sheetwhat", description="Submission correctness tests for spreadsheets."
+    )
+    commands = parser.add_subparsers(dest="command")
+    # add_subparsers(required=True) needs Python 3.7
+    commands.required = True
+
+    grade_parser = commands.add_parser(
+        "grade",
+        help="grade submissions in newline-delimited JSON",
+        description="Grade submissions in newline-delimited JSON, "
+        "and write a payload per line, in order.",
+    )
+    grade_parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="JSONL file with sct, student_data and solution_data or solution "
+        "on every line (default: stdin)",
+    )
+    grade_parser.add_argument(
+        "-o", "--output", help="file to write the payloads to (default: stdout)"
+    )
+    grade_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes (default: grade in this process)",
+    )
+    grade_parser.add_argument(
+        "--window",
+        type=int,
+        default=None,
+        help="number of lines read ahead of the output (default: 4 per job)",
+    )
+    grade_parser.add_argument(
+        "--solutions",
+        default=".",
+        help="directory that the solution paths are relative to",
+    )
+    grade_parser.set_defaults(run=grade)
+
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs has to be at least 1")
+    if args.window is not None and args.window < 1:
+        parser.error("--window has to be at least 1")
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
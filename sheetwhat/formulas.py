@@ -0,0 +1,262 @@
+"""Tokenizer and parser for spreadsheet formulas.
+
+Every formula is parsed once into a compact tree of namedtuples, that is
+cached by formula text, and the checks ask questions about it through the
+query helpers at the bottom of this module (``function_names``, ``operators``
+and ``references``).
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+Token = namedtuple("Token", ["type", "text"])
+
+# Nodes of the tree
+Call = namedtuple("Call", ["name", "args"])
+BinaryOp = namedtuple("BinaryOp", ["operator", "left", "right"])
+UnaryOp = namedtuple("UnaryOp", ["operator", "operand"])
+Reference = namedtuple("Reference", ["text"])
+Name = namedtuple("Name", ["text"])
+Literal = namedtuple("Literal", ["value"])
+Array = namedtuple("Array", ["rows"])
+
+# tree is None for values that aren't formulas and formulas that can't be parsed
+ParsedFormula = namedtuple("ParsedFormula", ["tokens", "tree"])
+
+TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<whitespace>\s+)
+    |(?P<string>"(?:[^"]|"")*")
+    |(?P<error>\#(?:NULL!|DIV/0!|VALUE!|REF!|NAME\?|NUM!|N/A|GETTING_DATA))
+    |(?P<reference>
+        (?:(?:'(?:[^']|'')+'|[A-Za-z_][\w.]*)!)?
+        (?:
+            \$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?
+            |\$?[A-Za-z]{1,3}:\$?[A-Za-z]{1,3}
+            |\$?\d+:\$?\d+
+        )
+        (?![\w(])
+    )
+    |(?P<function>[A-Za-z_][\w.]*(?=\s*\())
+    |(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    |(?P<boolean>(?i:TRUE|FALSE)\b)
+    |(?P<name>[A-Za-z_][\w.]*)
+    |(?P<operator><>|<=|>=|[-+*/^&=<>%])
+    |(?P<open>\()
+    |(?P<close>\))
+    |(?P<separator>[,;])
+    |(?P<open_array>\{)
+    |(?P<close_array>\})
+    |(?P<unknown>.)
+    """,
+    re.VERBOSE,
+)
+
+BINARY_PRECEDENCE = {
+    "=": 1,
+    "<>": 1,
+    "<": 1,
+    ">": 1,
+    "<=": 1,
+    ">=": 1,
+    "&": 2,
+    "+": 3,
+    "-": 3,
+    "*": 4,
+    "/": 4,
+    "^": 5,
+}
+
+
+class FormulaSyntaxError(ValueError):
+    pass
+
+
+def is_formula(value):
+    return isinstance(value, str) and value.startswith("=")
+
+
+def tokenize(formula):
+    """Split a formula (without the leading ``=``) into tokens, dropping whitespace."""
+    return tuple(
+        Token(match.lastgroup, match.group())
+        for match in TOKEN_PATTERN.finditer(formula)
+        if match.lastgroup != "whitespace"
+    )
+
+
+class Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return Token("end", "")
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def expect(self, token_type):
+        token = self.next()
+        if token.type != token_type:
+            raise FormulaSyntaxError(f"Expected {token_type}, got `{token.text}`.")
+        return token
+
+    def parse(self):
+        tree = self.expression()
+        if self.peek().type != "end":
+            raise FormulaSyntaxError(f"Unexpected `{self.peek().text}`.")
+        return tree
+
+    def expression(self, min_precedence=1):
+        left = self.prefix()
+        while True:
+            token = self.peek()
+            precedence = BINARY_PRECEDENCE.get(token.text)
+            if token.type != "operator" or precedence is None:
+                return left
+            if precedence < min_precedence:
+                return left
+            self.next()
+            left = BinaryOp(token.text, left, self.expression(precedence + 1))
+
+    def prefix(self):
+        token = self.peek()
+        if token.type == "operator" and token.text in ("+", "-"):
+            self.next()
+            return UnaryOp(token.text, self.prefix())
+        return self.postfix()
+
+    def postfix(self):
+        node = self.primary()
+        while self.peek() == Token("operator", "%"):
+            self.next()
+            node = UnaryOp("%", node)
+        return node
+
+    def primary(self):
+        token = self.next()
+        if token.type == "number":
+            number = float(token.text)
+            return Literal(int(number) if number.is_integer() else number)
+        if token.type == "string":
+            return Literal(token.text[1:-1].replace('""', '"'))
+        if token.type == "boolean":
+            return Literal(token.text.upper() == "TRUE")
+        if token.type == "error":
+            return Literal(token.text)
+        if token.type == "reference":
+            return Reference(token.text)
+        if token.type == "name":
+            return Name(token.text)
+        if token.type == "function":
+            return self.call(token.text)
+        if token.type == "open":
+            node = self.expression()
+            self.expect("close")
+            return node
+        if token.type == "open_array":
+            return self.array()
+        raise FormulaSyntaxError(f"Unexpected `{token.text}`.")
+
+    def call(self, name):
+        self.expect("open")
+        args = []
+        if self.peek().type == "close":
+            self.next()
+            return Call(name, tuple(args))
+        while True:
+            if self.peek().type in ("separator", "close"):
+                # omitted argument, e.g. IF(A1,,1)
+                args.append(Literal(None))
+            else:
+                args.append(self.expression())
+            token = self.next()
+            if token.type == "close":
+                return Call(name, tuple(args))
+            if token.type != "separator":
+                raise FormulaSyntaxError(f"Unexpected `{token.text}`.")
+
+    def array(self):
+        rows, row = [], []
+        while True:
+            row.append(self.expression())
+            token = self.next()
+            if token.type == "close_array":
+                rows.append(tuple(row))
+                return Array(tuple(rows))
+            if token == Token("separator", ";"):
+                rows.append(tuple(row))
+                row = []
+            elif token.type != "separator":
+                raise FormulaSyntaxError(f"Unexpected `{token.text}`.")
+
+
+@lru_cache(maxsize=4096)
+def parse_formula(formula):
+    """Tokenize and parse a formula, e.g. ``=SUM(A1:A3)``, once per formula text.
+
+    Returns a ``ParsedFormula``; its ``tree`` is None if the value isn't a
+    formula, or if the formula can't be parsed.
+    """
+    if not is_formula(formula):
+        return ParsedFormula((), None)
+    tokens = tokenize(formula[1:])
+    try:
+        tree = Parser(tokens).parse()
+    except FormulaSyntaxError:
+        tree = None
+    return ParsedFormula(tokens, tree)
+
+
+def walk(node):
+    """Iterate over a node and all of its descendants, depth first."""
+    yield node
+    if isinstance(node, Call):
+        for arg in node.args:
+            yield from walk(arg)
+    elif isinstance(node, BinaryOp):
+        yield from walk(node.left)
+        yield from walk(node.right)
+    elif isinstance(node, UnaryOp):
+        yield from walk(node.operand)
+    elif isinstance(node, Array):
+        for row in node.rows:
+            for element in row:
+                yield from walk(element)
+
+
+def _query(formula, node_types, token_type, from_node):
+    if not isinstance(formula, str):
+        return ()
+    parsed = parse_formula(formula)
+    if parsed.tree is not None:
+        return tuple(
+            from_node(node)
+            for node in walk(parsed.tree)
+            if isinstance(node, node_types)
+        )
+    # fall back on the tokens of formulas that can't be parsed
+    return tuple(token.text for token in parsed.tokens if token.type == token_type)
+
+
+def function_names(formula):
+    """Names of the functions called in a formula, upper case."""
+    return tuple(
+        name.upper() for name in _query(formula, Call, "function", lambda n: n.name)
+    )
+
+
+def operators(formula):
+    """Operators used in a formula, including unary ``-`` and ``%``."""
+    return _query(formula, (BinaryOp, UnaryOp), "operator", lambda n: n.operator)
+
+
+def references(formula):
+    """References to cells and ranges in a formula, as written."""
+    return _query(formula, Reference, "reference", lambda n: n.text)
@@ -0,0 +1,185 @@
+"""Time the checks of an SCT, to find out which one makes grading slow.
+
+Pass an ``Instrumentation`` to ``test_exercise()``: every function of the SCT
+context is wrapped to record its wall time, number of calls, the number of
+cells in the ranges it checked and, with ``trace_memory=True``, the peak memory
+it allocated (with ``tracemalloc``). Hits and misses of the compiled SCT cache
+and of the solution and student caches are counted too. The report is added to the payload::
+
+    payload = test_exercise(sct, student_data, solution_data,
+                            instrumentation=Instrumentation())
+    payload["instrumentation"]["checks"]["has_equal_value"]["time"]
+
+Without an ``Instrumentation``, SCTs run in the plain SCT context and nothing is
+recorded. Times include the time of the checks that a check calls, e.g. through
+``check_correct()``; their cells are counted for the innermost check only.
+"""
+
+import threading
+import time
+import tracemalloc
+import types
+from functools import wraps
+
+from protowhat.sct_syntax import create_sct_context
+
+from sheetwhat import sct_syntax
+from sheetwhat.State import State
+
+
+class _Running(threading.local):
+    # the Instrumentation that runs an SCT in this thread
+    instrumentation = None
+
+
+_running = _Running()
+
+# SCT context with every check wrapped, built on first use
+_sct_ctx = None
+
+
+def instrumented_sct_context():
+    """The SCT context, with every check wrapped to record its calls.
+
+    The wrappers record in the ``Instrumentation`` that runs the SCT in the
+    current thread, so the context is only built once.
+    """
+    global _sct_ctx
+    if _sct_ctx is None:
+        _sct_ctx = create_sct_context(
+            State,
+            {
+                name: _wrap(name, f) if isinstance(f, types.FunctionType) else f
+                for name, f in sct_syntax.sct_dict.items()
+            },
+        )
+    return _sct_ctx
+
+
+def _wrap(name, check):
+    @wraps(check)
+    def instrumented(*args, **kwargs):
+        instrumentation = _running.instrumentation
+        if instrumentation is None:
+            return check(*args, **kwargs)
+        instrumentation._enter(name)
+        try:
+            return check(*args, **kwargs)
+        finally:
+            instrumentation._exit()
+
+    return instrumented
+
+
+class Instrumentation:
+    """Records of the checks of one ``test_exercise()`` run."""
+
+    def __init__(self, trace_memory=False):
+        if trace_memory and not hasattr(tracemalloc, "reset_peak"):
+            raise ValueError("Tracing memory needs Python 3.9 or later.")
+        self.trace_memory = trace_memory
+        self.blocks = []
+        # name and duration of every call of a check
+        self.calls = []
+        # hits and misses per cache, e.g. {"solution": {"hits": 3, "misses": 1}}
+        self.caches = {}
+        # checks that are running, innermost last
+        self._stack = []
+
+    def run_sct(self, code, state):
+        """Run the code of a single SCT on ``state``, as one block of the report."""
+        namespace = sct_syntax.sct_namespace(state, instrumented_sct_context())
+        block = {"range": state.sct_range, "time": 0.0, "checks": {}}
+        self.blocks.append(block)
+
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        self._stack.append(_Frame(block))
+        outer, _running.instrumentation = _running.instrumentation, self
+        start = time.perf_counter()
+        try:
+            exec(code, namespace)
+        finally:
+            block["time"] = time.perf_counter() - start
+            _running.instrumentation = outer
+            frame = self._stack.pop()
+            if self.trace_memory:
+                self._fold_peak(frame)
+                block["peak_memory"] = frame.peak
+            if started_tracing:
+                tracemalloc.stop()
+
+    def count_lookup(self, cache_name, hit):
+        """Count a lookup in the compiled SCT cache, or the solution or student
+        cache of the states."""
+        counts = self.caches.setdefault(cache_name, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+
+    def add_cells(self, n_cells):
+        """Count cells for the innermost running check."""
+        if self._stack:
+            self._stack[-1].cells += n_cells
+
+    def _enter(self, name):
+        if self.trace_memory:
+            self._fold_peak()
+        self._stack.append(_Frame(self._stack[-1].block, name))
+
+    def _exit(self):
+        frame = self._stack.pop()
+        duration = time.perf_counter() - frame.start
+        self.calls.append((frame.name, duration))
+        record = frame.block["checks"].setdefault(
+            frame.name, {"calls": 0, "time": 0.0, "cells": 0}
+        )
+        record["calls"] += 1
+        record["time"] += duration
+        record["cells"] += frame.cells
+        if self.trace_memory:
+            self._fold_peak(frame)
+            record["peak_memory"] = max(record.get("peak_memory", 0), frame.peak)
+
+    def _fold_peak(self, *frames):
+        """Update the peak memory of the running checks, and reset the peak.
+
+        Peaks are relative to the memory that was in use when the check started.
+        """
+        _, peak = tracemalloc.get_traced_memory()
+        for frame in [*self._stack, *frames]:
+            frame.peak = max(frame.peak, peak - frame.memory)
+        tracemalloc.reset_peak()
+
+    def report(self):
+        """Records per check and per SCT block, as a dict that can be dumped to JSON."""
+        checks = {}
+        for block in self.blocks:
+            for name, record in block["checks"].items():
+                total = checks.setdefault(name, {"calls": 0, "time": 0.0, "cells": 0})
+                total["calls"] += record["calls"]
+                total["time"] += record["time"]
+                total["cells"] += record["cells"]
+                if "peak_memory" in record:
+                    total["peak_memory"] = max(
+                        total.get("peak_memory", 0), record["peak_memory"]
+                    )
+        return {
+            "time": sum(block["time"] for block in self.blocks),
+            "checks": checks,
+            "blocks": self.blocks,
+            "caches": self.caches,
+        }
+
+
+class _Frame:
+    """A running check, or a running SCT block if it has no name."""
+
+    __slots__ = ("block", "name", "start", "cells", "memory", "peak")
+
+    def __init__(self, block, name=None):
+        self.block = block
+        self.name = name
+        self.start = time.perf_counter()
+        self.cells = 0
+        self.memory = tracemalloc.get_traced_memory()[0]
+        self.peak = 0
@@ -0,0 +1,267 @@
+"""Metrics of a long-running grader, in the Prometheus text format.
+
+Pass a ``Metrics`` to ``test_exercise()`` or ``test_exercise_batch()`` to count
+the graded submissions by result, and to record how long grading and every call
+of a check took, and the hits and misses of the caches::
+
+    metrics = Metrics()
+    payload = test_exercise(sct, student_data, solution_data, metrics=metrics)
+    text = metrics.render()
+
+``render()`` returns the metrics in the Prometheus text exposition format, e.g.
+to serve them on a ``/metrics`` endpoint. A ``MetricsFileWriter`` writes them to
+a file periodically instead, e.g. for the textfile collector of the node exporter.
+
+Every thread records in its own shard, so threads that grade concurrently never
+wait on each other; ``render()`` adds up the shards. The shard of a thread that
+ends is added to the shard of all ended threads, so threads can come and go, e.g.
+a thread per request, without the shards piling up.
+"""
+
+import os
+import threading
+import weakref
+from bisect import bisect_left
+
+# upper bounds of the histogram buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# type and help text of every metric, in the order they are rendered
+METRICS = {
+    "sheetwhat_submissions_total": (
+        "counter",
+        "Graded submissions, by result: correct, incorrect or error.",
+    ),
+    "sheetwhat_grading_seconds": ("histogram", "Time to grade a submission."),
+    "sheetwhat_check_seconds": ("histogram", "Time of a call of a check, by check."),
+    "sheetwhat_cache_lookups_total": (
+        "counter",
+        "Lookups in the SCT, solution and student caches, by cache and result.",
+    ),
+}
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, n_buckets):
+        # observations per bucket, not cumulative; the last one is +Inf
+        self.counts = [0] * (n_buckets + 1)
+        self.sum = 0.0
+
+
+class _Shard:
+    """The metrics that were recorded by one thread."""
+
+    __slots__ = ("counters", "histograms")
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+    def add(self, other):
+        """Add the counters and histograms of another shard to this one."""
+        # copying a dict is atomic, the thread of the other shard can keep recording
+        for key, value in list(other.counters.items()):
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, histogram in list(other.histograms.items()):
+            total = self.histograms.get(key)
+            if total is None:
+                total = self.histograms[key] = _Histogram(len(histogram.counts) - 1)
+            for i, count in enumerate(histogram.counts):
+                total.counts[i] += count
+            total.sum += histogram.sum
+
+
+class _ShardRef:
+    # held by the thread-local of a thread only, so it's dropped when the thread ends
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self, shard):
+        self.shard = shard
+
+
+class Metrics:
+    """Counters and histograms of grading, aggregated in this process.
+
+    Metrics are keyed by name and labels, a tuple of ``(label, value)`` pairs.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._local = threading.local()
+        # only locked when a thread records for the first time or ends, and to collect
+        self._lock = threading.Lock()
+        # shards of the running threads
+        self._shards = set()
+        # the metrics recorded by threads that ended
+        self._ended = _Shard()
+
+    def _shard(self):
+        try:
+            return self._local.ref.shard
+        except AttributeError:
+            shard = _Shard()
+            ref = self._local.ref = _ShardRef(shard)
+            with self._lock:
+                self._shards.add(shard)
+            weakref.finalize(ref, self._end_shard, shard)
+            return shard
+
+    def _end_shard(self, shard):
+        with self._lock:
+            self._shards.discard(shard)
+            self._ended.add(shard)
+
+    def inc(self, name, labels=(), value=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=()):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = _Histogram(len(self.buckets))
+        histogram.counts[bisect_left(self.buckets, value)] += 1
+        histogram.sum += value
+
+    def record_submission(self, result, seconds, instrumentation):
+        """Record a ``test_exercise()`` run, with the calls and cache lookups
+        that its ``Instrumentation`` recorded."""
+        self.inc("sheetwhat_submissions_total", (("result", result),))
+        self.observe("sheetwhat_grading_seconds", seconds)
+        for name, duration in instrumentation.calls:
+            self.observe("sheetwhat_check_seconds", duration, (("check", name),))
+        for cache_name, counts in instrumentation.caches.items():
+            for lookup, count in [("hit", counts["hits"]), ("miss", counts["misses"])]:
+                self.inc(
+                    "sheetwhat_cache_lookups_total",
+                    (("cache", cache_name), ("result", lookup)),
+                    count,
+                )
+
+    def collect(self):
+        """Counters and histograms of all threads, added up.
+
+        Returns two dicts keyed by name and labels: counter values, and pairs of
+        cumulative bucket counts and sum for histograms.
+        """
+        total = _Shard()
+        with self._lock:
+            total.add(self._ended)
+            for shard in self._shards:
+                total.add(shard)
+        counters = total.counters
+        histograms = {}
+        for key, histogram in total.histograms.items():
+            cumulative = 0
+            counts = []
+            for count in histogram.counts:
+                cumulative += count
+                counts.append(cumulative)
+            histograms[key] = (counts, histogram.sum)
+        return counters, histograms
+
+    def render(self):
+        """All metrics, in the Prometheus text exposition format (version 0.0.4)."""
+        counters, histograms = self.collect()
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            samples = counters if metric_type == "counter" else histograms
+            keys = sorted(
+                labels for sample_name, labels in samples if sample_name == name
+            )
+            if not keys:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels in keys:
+                if metric_type == "counter":
+                    lines.append(_sample(name, labels, counters[(name, labels)]))
+                    continue
+                counts, total = histograms[(name, labels)]
+                bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, counts):
+                    lines.append(
+                        _sample(f"{name}_bucket", labels + (("le", bound),), count)
+                    )
+                lines.append(_sample(f"{name}_sum", labels, total))
+                lines.append(_sample(f"{name}_count", labels, counts[-1]))
+        return "".join(f"{line}\n" for line in lines)
+
+
+def _sample(name, labels, value):
+    if labels:
+        label_text = ",".join(
+            f'{label}="{_escape(str(label_value))}"' for label, label_value in labels
+        )
+        name = f"{name}{{{label_text}}}"
+    return f"{name} {value}"
+
+
+def _escape(label_value):
+    return label_value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsFileWriter:
+    """Write the metrics to a file every ``interval`` seconds, in a background thread.
+
+    The file is replaced atomically, so readers never see a partial file.
+    Use it as a context manager, or call ``start()`` and ``stop()``; the file is
+    written once more when it stops.
+    """
+
+    def __init__(self, metrics, path, interval=15.0):
+        self.metrics = metrics
+        self.path = os.fspath(path)
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def write(self):
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as fp:
+            fp.write(self.metrics.render())
+        os.replace(temp_path, self.path)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.write()
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sheetwhat-metrics", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,150 @@
+"""Grade many submissions against the same exercise on all cores of a machine.
+
+Usage from the command line::
+
+    python -m sheetwhat.parallel exercise.json submissions.json -o payloads.json
+
+``exercise.json`` holds an object with ``sct``, ``solution_data`` and optionally
+``success_msg``; ``submissions.json`` holds a list of ``student_data`` objects.
+"""
+
+import argparse
+import functools
+import json
+import pickle
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from sheetwhat.sct_cache import compile_sct
+from sheetwhat.sheet import to_sheet
+
+# exercise each worker process grades, set up by _init_worker for its first submission
+_worker = {}
+
+
+def error_payload(exception):
+    return {
+        "correct": False,
+        "message": "Something went wrong while grading this submission.",
+        "error": f"{type(exception).__name__}: {exception}",
+    }
+
+
+def _init_worker(key, exercise):
+    sct, solution_data, success_msg = pickle.loads(exercise)
+    _worker.clear()
+    # building the SCT context imports all checks, compiling warms the SCT cache
+    from sheetwhat.sct_syntax import sct_context
+    from sheetwhat.test_exercise import test_exercise
+
+    sct_context()
+
+    for single_sct in sct:
+        try:
+            compile_sct(single_sct.get("sct", []))
+        except SyntaxError:
+            # reported for every submission by _grade
+            pass
+
+    _worker.update(
+        key=key,
+        test_exercise=test_exercise,
+        sct=sct,
+        solution_data=to_sheet(solution_data),
+        success_msg=success_msg,
+        solution_cache={},
+    )
+
+
+def _grade(key, exercise, student_data):
+    try:
+        if _worker.get("key") != key:
+            # a worker that fails to set up reports it for every submission
+            _init_worker(key, exercise)
+        return _worker["test_exercise"](
+            _worker["sct"],
+            student_data,
+            _worker["solution_data"],
+            success_msg=_worker["success_msg"],
+            solution_cache=_worker["solution_cache"],
+        )
+    except Exception as e:
+        return error_payload(e)
+
+
+def grade_parallel(
+    sct, solution_data, submissions, success_msg=None, max_workers=None, chunksize=16
+):
+    """Grade ``submissions`` (an iterable of ``student_data``) in a process pool.
+
+    Every worker imports the SCT context and compiles the SCTs once, for the first
+    submission it grades, and keeps a solution cache that is shared by all
+    submissions it grades. Submissions are handed out in chunks of ``chunksize``,
+    together with the pickled exercise.
+
+    Returns the payloads in the order of ``submissions``. A submission for which
+    grading raises gets an error payload instead, without affecting the others.
+    """
+
+    assert isinstance(sct, list)
+    assert isinstance(solution_data, dict)
+
+    # pickled once, rather than for every chunk; ProcessPoolExecutor's initializer
+    # needs Python 3.7
+    exercise = pickle.dumps(
+        (sct, solution_data, success_msg), protocol=pickle.HIGHEST_PROTOCOL
+    )
+    # forked workers inherit _worker, the key tells this exercise from others
+    grade = functools.partial(_grade, uuid.uuid4().hex, exercise)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(grade, submissions, chunksize=chunksize))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m sheetwhat.parallel",
+        description="Grade a list of submissions to the same exercise in parallel.",
+    )
+    parser.add_argument(
+        "exercise", help="JSON file with sct, solution_data and optionally success_msg"
+    )
+    parser.add_argument("submissions", help="JSON file with a list of student_data")
+    parser.add_argument(
+        "-o", "--output", help="file to write the payloads to (default: stdout)"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=16,
+        help="number of submissions sent to a worker at once",
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.exercise, encoding="utf-8") as fp:
+        exercise = json.load(fp)
+    with open(args.submissions, encoding="utf-8") as fp:
+        submissions = json.load(fp)
+
+    payloads = grade_parallel(
+        exercise["sct"],
+        exercise["solution_data"],
+        submissions,
+        success_msg=exercise.get("success_msg"),
+        max_workers=args.jobs,
+        chunksize=args.chunksize,
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(payloads, fp)
+    else:
+        json.dump(payloads, sys.stdout)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
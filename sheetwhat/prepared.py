@@ -0,0 +1,124 @@
+"""Solution-side work, done once and saved to a file.
+
+``prepare_solution()`` compiles the SCTs and runs them with the solution as the
+student submission, which fills the solution cache with everything the checks
+derive from the solution: cropped ranges, normalized formulas, references,
+rounded values, ... The result can be saved, e.g. when an exercise is published,
+and loaded by graders at startup::
+
+    prepare_solution(sct, solution_data).save("exercise.sheetwhat")
+
+    prepared = load_solution("exercise.sheetwhat")
+    payload = prepared.test_exercise(student_data)
+"""
+
+import marshal
+import pickle
+import sys
+
+from sheetwhat.sct_cache import sct_cache
+from sheetwhat.sheet import to_sheet
+from sheetwhat.test_exercise import test_exercise, test_exercise_batch
+
+# version of the file format, bumped when it changes
+FORMAT_VERSION = 1
+
+
+class PreparedSolution:
+    """An SCT and solution, with their compiled code and warm solution cache."""
+
+    def __init__(self, sct, solution_data, solution_cache, code=None):
+        self.sct = sct
+        self.solution_data = solution_data
+        self.solution_cache = solution_cache
+        # compiled code of every single SCT, in the shared SCT cache too
+        self.code = code or [
+            sct_cache.compile(_source(single_sct)) for single_sct in sct
+        ]
+        for single_sct, code_object in zip(sct, self.code):
+            sct_cache.add(_source(single_sct), code_object)
+
+    def test_exercise(self, student_data, success_msg=None):
+        return test_exercise(
+            self.sct,
+            student_data,
+            self.solution_data,
+            success_msg=success_msg,
+            solution_cache=self.solution_cache,
+        )
+
+    def test_exercise_batch(self, student_iter, success_msg=None):
+        return test_exercise_batch(
+            self.sct,
+            self.solution_data,
+            student_iter,
+            success_msg=success_msg,
+            solution_cache=self.solution_cache,
+        )
+
+    def dumps(self):
+        return pickle.dumps(
+            {
+                "format": FORMAT_VERSION,
+                # marshalled code only loads in the same Python version
+                "python": sys.implementation.cache_tag,
+                "sct": self.sct,
+                "code": [marshal.dumps(code_object) for code_object in self.code],
+                "solution_data": self.solution_data,
+                "solution_cache": self.solution_cache,
+            },
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+
+    def save(self, path):
+        with open(path, "wb") as fp:
+            fp.write(self.dumps())
+
+    @classmethod
+    def loads(cls, data):
+        artifact = pickle.loads(data)
+        if artifact.get("format") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported prepared solution format: {artifact.get('format')}."
+            )
+        code = None
+        if artifact["python"] == sys.implementation.cache_tag:
+            code = [marshal.loads(code_bytes) for code_bytes in artifact["code"]]
+        return cls(
+            artifact["sct"],
+            artifact["solution_data"],
+            artifact["solution_cache"],
+            code=code,
+        )
+
+
+def prepare_solution(sct, solution_data):
+    """Compile the SCTs and derive everything the checks need from the solution.
+
+    The values and formulas of the solution are stored in ``Grid``s.
+    Returns a ``PreparedSolution``. Raises ``SyntaxError`` for invalid SCTs,
+    and ``ValueError`` if the solution doesn't pass its own SCTs.
+    """
+    assert isinstance(sct, list)
+    assert isinstance(solution_data, dict)
+
+    prepared = PreparedSolution(sct, to_sheet(solution_data), {})
+    payload = prepared.test_exercise(prepared.solution_data)
+    if not payload["correct"]:
+        raise ValueError(
+            f"The solution doesn't pass its own SCT: {payload.get('message')}"
+        )
+    return prepared
+
+
+def load_solution(path):
+    """Load a ``PreparedSolution`` that was saved with ``PreparedSolution.save()``.
+
+    Only load files from trusted sources: they are unpickled.
+    """
+    with open(path, "rb") as fp:
+        return PreparedSolution.loads(fp.read())
+
+
+def _source(single_sct):
+    return "\n".join(single_sct.get("sct", []))
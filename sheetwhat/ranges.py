@@ -0,0 +1,103 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Zero-based row and column indices of a range, ends are exclusive.
+# end_row and end_column are None if the range is unbounded in that direction,
+# e.g. for whole columns (A:A) and whole rows (3:3).
+CellRange = namedtuple(
+    "CellRange", ["sheet", "start_row", "end_row", "start_column", "end_column"]
+)
+
+RANGE_PATTERN = re.compile(
+    r"""
+    ^\s*
+    (?:(?P<sheet>'(?:[^']|'')+'|[^'!:]+)!)?
+    \$?(?P<start_column>[a-zA-Z]+)?\$?(?P<start_row>\d+)?
+    (?P<colon>:\$?(?P<end_column>[a-zA-Z]+)?\$?(?P<end_row>\d+)?)?
+    \s*$
+    """,
+    re.VERBOSE,
+)
+
+CELL_PATTERN = re.compile(r"^\$?([a-zA-Z]+)\$?(\d+)$")
+
+BASE = 26
+NUMBER_OF_FIRST = ord("A")
+
+
+@lru_cache(maxsize=1024)
+def letters_to_numbers(letters):
+    number = 0
+    for letter in letters.upper():
+        number = number * BASE + ord(letter) - NUMBER_OF_FIRST + 1
+    return number - 1
+
+
+def numbers_to_letters(number):
+    letters = ""
+    number += 1
+    while number > 0:
+        number, remainder = divmod(number - 1, BASE)
+        letters = chr(NUMBER_OF_FIRST + remainder) + letters
+    return letters
+
+
+@lru_cache(maxsize=1024)
+def parse_range(range_spec):
+    """Parse a range in A1 notation into a ``CellRange``.
+
+    Supports single cells (``A1``), ranges (``A1:B2``), absolute references
+    (``$A$1``), whole columns (``A:B``), whole rows (``3:5``) and sheet names
+    (``Sheet1!A1:B2``, ``'My sheet'!A1``). Raises ``ValueError`` for anything else.
+    """
+    match = RANGE_PATTERN.match(range_spec)
+    if match is None or not _is_valid(**match.groupdict()):
+        raise ValueError(f"`{range_spec}` is not a valid range.")
+    groups = match.groupdict()
+
+    start_column, start_row = groups["start_column"], groups["start_row"]
+    if groups["colon"] is None:
+        end_column, end_row = start_column, start_row
+    else:
+        end_column, end_row = groups["end_column"], groups["end_row"]
+
+    rows = _bounds(start_row, end_row, lambda row: int(row) - 1)
+    columns = _bounds(start_column, end_column, letters_to_numbers)
+
+    sheet = groups["sheet"]
+    if sheet is not None and sheet.startswith("'"):
+        sheet = sheet[1:-1].replace("''", "'")
+
+    return CellRange(sheet, *rows, *columns)
+
+
+def _is_valid(sheet, start_column, start_row, colon, end_column, end_row):
+    if colon is None:
+        # a single cell: A1
+        return start_column is not None and start_row is not None
+    if (start_column is None) != (end_column is None):
+        # A1:3 or 3:B2
+        return False
+    if start_row is None and end_row is not None:
+        # A:B2
+        return False
+    # A1:B2, A:B, 1:2 and A1:B, but not :
+    return start_column is not None or (start_row is not None and end_row is not None)
+
+
+def _bounds(start, end, to_index):
+    """Start and exclusive end index along one axis, None for an unbounded end."""
+    start = 0 if start is None else to_index(start)
+    if end is None:
+        return start, None
+    end = to_index(end)
+    return min(start, end), max(start, end) + 1
+
+
+def parse_cell(cell_name):
+    """Zero-based row and column index of a single cell, e.g. ``B3`` is (2, 1)."""
+    match = CELL_PATTERN.match(cell_name)
+    if match is None or int(match.group(2)) == 0:
+        raise ValueError(f"`{cell_name}` is not a valid cell.")
+    return int(match.group(2)) - 1, letters_to_numbers(match.group(1))
@@ -0,0 +1,98 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class SCTCache:
+    """Bounded LRU cache of compiled SCT code objects.
+
+    Entries are keyed on a hash of the SCT source, so every distinct SCT is
+    compiled once per process and the code object is reused afterwards.
+    A ``maxsize`` of 0 disables caching altogether. The cache can be shared by
+    threads; compilation itself happens outside of the lock.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._code = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(source):
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    def compile(self, source):
+        return self.lookup(source)[0]
+
+    def lookup(self, source):
+        """The code object of ``source``, and whether it was in the cache."""
+        key = self.key(source)
+        with self._lock:
+            code = self._code.get(key)
+            if code is not None:
+                self.hits += 1
+                self._code.move_to_end(key)
+                return code, True
+            self.misses += 1
+
+        code = compile(source, "<sct>", "exec")
+        if self.maxsize > 0:
+            with self._lock:
+                self._code[key] = code
+                self._evict()
+        return code, False
+
+    def add(self, source, code):
+        """Cache a code object that was compiled elsewhere, e.g. loaded from a file."""
+        if self.maxsize > 0:
+            with self._lock:
+                self._code[self.key(source)] = code
+                self._evict()
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._code.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._code),
+                "maxsize": self.maxsize,
+            }
+
+    def _evict(self):
+        while len(self._code) > max(self.maxsize, 0):
+            self._code.popitem(last=False)
+
+    def __len__(self):
+        return len(self._code)
+
+    def __contains__(self, source):
+        return self.key(source) in self._code
+
+
+# shared by all calls to test_exercise in this process
+sct_cache = SCTCache()
+
+
+def compile_sct(sct_lines, cache=None, instrumentation=None):
+    """Join the lines of a single SCT and return its (cached) code object.
+
+    The lookup is counted as the ``sct`` cache of an ``instrumentation``.
+    """
+    cache = sct_cache if cache is None else cache
+    code, hit = cache.lookup("\n".join(sct_lines))
+    if instrumentation is not None:
+        instrumentation.count_lookup("sct", hit)
+    return code
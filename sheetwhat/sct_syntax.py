@@ -1,21 +1,59 @@
 # Wrap SCT checks -------------------------------------------------------------
 
+import sys
+import threading
+import types
+
 from sheetwhat.State import State
 from sheetwhat import checks
-import builtins
-from protowhat.sct_syntax import create_sct_context
+from protowhat.sct_syntax import create_sct_context, ExGen
 
-# used in Chain and F, to know what methods are available
-sct_dict = {
-    k: v
-    for k, v in vars(checks).items()
-    if k not in builtins.__dict__
-    if not k.startswith("__")
-}
-SCT_CTX = create_sct_context(State, sct_dict)
+# put on module for easy importing
+__all__ = [*checks.__all__, "Ex", "F", "state_dec"]
 
-# used in test_exercise, so that scts without Ex() don't run immediately
-globals().update(SCT_CTX)
+# building the SCT context imports all checks, so it's built on first use
+_lock = threading.Lock()
 
-# put on module for easy importing
-__all__ = list(SCT_CTX.keys())
+
+def sct_context():
+    """The SCT context: ``Ex()``, ``F()`` and every check, wrapped to be chained.
+
+    Built on first use, and put on the module as ``SCT_CTX``, together with
+    ``sct_dict`` (used in Chain and F, to know what methods are available) and
+    every name of the context.
+    """
+    sct_ctx = globals().get("SCT_CTX")
+    if sct_ctx is None:
+        with _lock:
+            sct_ctx = globals().get("SCT_CTX")
+            if sct_ctx is None:
+                sct_dict = {name: getattr(checks, name) for name in checks.__all__}
+                sct_ctx = create_sct_context(State, sct_dict)
+                # used in test_exercise, so that scts without Ex() don't run immediately
+                globals().update(sct_ctx, sct_dict=sct_dict)
+                globals()["SCT_CTX"] = sct_ctx
+    return sct_ctx
+
+
+def sct_namespace(root_state, sct_ctx=None):
+    """Fresh globals to exec an SCT in, with ``Ex()`` bound to ``root_state``.
+
+    Built from the SCT_CTX template (or another ``sct_ctx``) on every call, so
+    concurrent runs never share a root state and nothing an SCT defines leaks
+    into the next one.
+    """
+    if sct_ctx is None:
+        sct_ctx = sct_context()
+    return {**sct_ctx, "Ex": ExGen(root_state, sct_ctx["Ex"].attr_scts)}
+
+
+class _SctSyntaxModule(types.ModuleType):
+    # a module-level __getattr__ function needs Python 3.7
+    def __getattr__(self, name):
+        if name in ("SCT_CTX", "sct_dict") or name in __all__:
+            sct_context()
+            return self.__dict__[name]
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+sys.modules[__name__].__class__ = _SctSyntaxModule
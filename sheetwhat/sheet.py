@@ -0,0 +1,290 @@
+"""Compact storage for the values and formulas of a sheet.
+
+A ``Grid`` stores a 2D list column by column: columns of integers or floats
+in typed arrays, mostly empty columns in a dict and all other columns in a
+list, with interned strings. A ``SparseGrid`` only stores the cells that aren't
+empty, for sheets that are given by cell name. Both behave like the 2D list
+they represent, so the checks and ``RangeView`` work on them unchanged.
+"""
+
+import sys
+from array import array
+from itertools import islice
+
+from sheetwhat.ranges import parse_cell
+
+# fields of the data that are converted by to_sheet
+GRID_FIELDS = ("values", "formulas")
+
+# placeholder for the cells past the end of a short row
+_absent = object()
+
+
+class SparseColumn:
+    """A column that is mostly empty: only the cells that aren't None are stored."""
+
+    __slots__ = ("cells", "length")
+
+    def __init__(self, cells, length):
+        self.cells = cells
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(map(self.cells.get, range(*index.indices(self.length))))
+        return self.cells.get(index)
+
+
+def _intern(cell):
+    return sys.intern(cell) if type(cell) is str else cell
+
+
+def compact_column(cells):
+    """Store the cells of a column in the most compact way that fits them.
+
+    Cells that are ``_absent`` can be stored as anything.
+    """
+    present = [cell for cell in cells if cell is not _absent]
+    filled = sum(1 for cell in present if cell is not None)
+    if filled * 2 <= len(cells):
+        return SparseColumn(
+            {
+                i: _intern(cell)
+                for i, cell in enumerate(cells)
+                if cell is not None and cell is not _absent
+            },
+            len(cells),
+        )
+
+    cell_types = {type(cell) for cell in present}
+    if cell_types == {int}:
+        try:
+            return array("q", [0 if cell is _absent else cell for cell in cells])
+        except OverflowError:
+            pass
+    if cell_types == {float}:
+        return array("d", [0.0 if cell is _absent else cell for cell in cells])
+    return [None if cell is _absent else _intern(cell) for cell in cells]
+
+
+class GridRow:
+    """A row of a ``Grid``, that reads its cells from the columns."""
+
+    __slots__ = ("grid", "index")
+
+    def __init__(self, grid, index):
+        self.grid = grid
+        self.index = index
+
+    def __len__(self):
+        return self.grid.row_lengths[self.index]
+
+    def __getitem__(self, index):
+        columns = self.grid.columns
+        if isinstance(index, slice):
+            return [columns[j][self.index] for j in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("GridRow index out of range")
+        return columns[index][self.index]
+
+    def __iter__(self):
+        return (column[self.index] for column in islice(self.grid.columns, len(self)))
+
+    def to_list(self):
+        return list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, (GridRow, list)):
+            return self.to_list() == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"GridRow({self.to_list()!r})"
+
+
+class BaseGrid:
+    """A 2D list of cells, stored in another way than as a list of lists.
+
+    Subclasses implement ``__len__``, ``row()`` and ``window()``.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"{type(self).__name__} index out of range")
+        return self.row(index)
+
+    def __iter__(self):
+        return (self.row(i) for i in range(len(self)))
+
+    def present_rows(self, start_row, end_row, start_column, end_column):
+        """Window rows that can hold cells, by their index in the window.
+
+        The other rows are empty (``[]``).
+        """
+        return dict(
+            enumerate(self.window(start_row, end_row, start_column, end_column))
+        )
+
+    def to_list(self):
+        return self.window(0, len(self), 0, None)
+
+    def __eq__(self, other):
+        if isinstance(other, BaseGrid):
+            return self.to_list() == other.to_list()
+        if isinstance(other, list):
+            return self.to_list() == [list(row) for row in other]
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_list()!r})"
+
+
+class Grid(BaseGrid):
+    """A 2D list of cells, stored column by column.
+
+    Rows can differ in length, like the rows of the values and formulas of
+    a sheet. Indexing returns a ``GridRow``; ``window()`` efficiently cuts a
+    range out of the grid.
+    """
+
+    __slots__ = ("columns", "row_lengths")
+
+    def __init__(self, array_2d):
+        self.row_lengths = array("L", [len(row) for row in array_2d])
+        n_columns = max(self.row_lengths, default=0)
+        self.columns = [
+            compact_column([row[j] if j < len(row) else _absent for row in array_2d])
+            for j in range(n_columns)
+        ]
+
+    def __len__(self):
+        return len(self.row_lengths)
+
+    def row(self, index):
+        return GridRow(self, index)
+
+    def window(self, start_row, end_row, start_column, end_column):
+        """Rows of the cells in a range, as lists, cut short like the rows."""
+        lengths = self.row_lengths[start_row:end_row]
+        slices = [
+            column[start_row:end_row]
+            for column in self.columns[start_column:end_column]
+        ]
+        if not slices:
+            return [[] for _ in lengths]
+        rows = zip(*slices)
+        if min(lengths, default=0) >= start_column + len(slices):
+            # no short rows in the window
+            return list(map(list, rows))
+        return [
+            list(row[: max(length - start_column, 0)])
+            for row, length in zip(rows, lengths)
+        ]
+
+
+class SparseGrid(BaseGrid):
+    """A mostly empty 2D list of cells, that only stores the cells that aren't None.
+
+    Built from cells by their A1 name, e.g. ``{"A1": 1, "C7": "=A1"}``.
+    Like a sheet, a row is as long as its last cell, so rows without cells are
+    empty (``[]``) and cells before the last one that aren't given are None.
+    Finding the cells in a window only costs time for the rows that have cells.
+    """
+
+    __slots__ = ("rows", "n_rows")
+
+    def __init__(self, cells):
+        self.rows = {}
+        for cell_name, cell in cells.items():
+            if cell is not None:
+                i, j = parse_cell(cell_name)
+                self.rows.setdefault(i, {})[j] = _intern(cell)
+        self.n_rows = max(self.rows, default=-1) + 1
+
+    @classmethod
+    def from_rows(cls, rows, n_rows):
+        """Build from the rows that have cells, by index, e.g. from ``present_rows()``."""
+        grid = cls({})
+        for i, row in rows.items():
+            cells = {j: _intern(cell) for j, cell in enumerate(row) if cell is not None}
+            if cells:
+                grid.rows[i] = cells
+        grid.n_rows = n_rows
+        return grid
+
+    def __len__(self):
+        return self.n_rows
+
+    def row(self, index):
+        row = self.rows.get(index)
+        if row is None:
+            return []
+        return list(map(row.get, range(max(row) + 1)))
+
+    def window(self, start_row, end_row, start_column, end_column):
+        present = self.present_rows(start_row, end_row, start_column, end_column)
+        return [present.get(i, []) for i in range(max(end_row - start_row, 0))]
+
+    def present_rows(self, start_row, end_row, start_column, end_column):
+        if len(self.rows) < end_row - start_row:
+            indices = sorted(i for i in self.rows if start_row <= i < end_row)
+        else:
+            indices = [i for i in range(start_row, end_row) if i in self.rows]
+        present = {}
+        for i in indices:
+            row = self.rows[i]
+            end = max(row) + 1
+            if end_column is not None:
+                end = min(end, end_column)
+            present[i - start_row] = list(map(row.get, range(start_column, end)))
+        return present
+
+
+def is_sparse(field):
+    """Whether the values or formulas of a sheet are given by cell name."""
+    return isinstance(field, dict) and isinstance(field.get("cells"), dict)
+
+
+def parse_sparse(data):
+    """Return the data with its values and formulas in a ``SparseGrid`` if they're
+    given by cell name, e.g. ``{"cells": {"A1": 1, "B7": 2}}``, and as-is if not."""
+    sparse_fields = [field for field in GRID_FIELDS if is_sparse(data.get(field))]
+    if not sparse_fields:
+        return data
+    return {
+        **data,
+        **{field: SparseGrid(data[field]["cells"]) for field in sparse_fields},
+    }
+
+
+def to_sheet(data):
+    """Return a copy of a data dict, with its values and formulas in ``Grid``s.
+
+    Worth it for data that is graded many times, like the solution data of
+    a batch, or that is kept in memory for a long time. Values and formulas
+    that are given by cell name are stored in a ``SparseGrid``.
+    """
+    data = parse_sparse(data)
+    return {
+        **data,
+        **{
+            field: Grid(data[field])
+            for field in GRID_FIELDS
+            if isinstance(data.get(field), list)
+        },
+    }
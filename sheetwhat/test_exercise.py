@@ -1,31 +1,87 @@
+import time
+
 from protowhat.Test import TestFail
 from protowhat.Reporter import Reporter
 
-from sheetwhat.sct_syntax import SCT_CTX
+from sheetwhat.sct_syntax import sct_namespace
+from sheetwhat.sct_cache import compile_sct
+from sheetwhat.sheet import parse_sparse, to_sheet
 from sheetwhat.State import State
 
 
-def test_exercise(sct, student_data, solution_data, success_msg=None):
+def test_exercise(
+    sct,
+    student_data,
+    solution_data,
+    success_msg=None,
+    solution_cache=None,
+    instrumentation=None,
+    metrics=None,
+):
     """
+    Pass an ``Instrumentation`` (see ``sheetwhat.instrumentation``) to record the
+    time of every check; its report is added to the payload as ``instrumentation``.
+    Pass a ``Metrics`` (see ``sheetwhat.metrics``) to add the run to its counters
+    and histograms.
     """
 
     assert isinstance(sct, list)
     assert isinstance(student_data, dict)
     assert isinstance(solution_data, dict)
 
+    # values and formulas can be given by cell name
+    student_data = parse_sparse(student_data)
+    solution_data = parse_sparse(solution_data)
+
+    recorder = instrumentation
+    if metrics is not None and recorder is None:
+        # the metrics need the calls of the checks
+        from sheetwhat.instrumentation import Instrumentation
+
+        recorder = Instrumentation()
+    start = time.perf_counter()
+    try:
+        payload = _run_scts(
+            sct, student_data, solution_data, success_msg, solution_cache, recorder
+        )
+    except Exception:
+        if metrics is not None:
+            metrics.record_submission("error", time.perf_counter() - start, recorder)
+        raise
+    if metrics is not None:
+        result = "correct" if payload["correct"] else "incorrect"
+        metrics.record_submission(result, time.perf_counter() - start, recorder)
+
+    if instrumentation is not None:
+        payload["instrumentation"] = instrumentation.report()
+    return payload
+
+
+def _run_scts(
+    sct, student_data, solution_data, success_msg, solution_cache, instrumentation
+):
     rep = Reporter()
+    # everything derived from the student data, for the checks of all SCTs
+    student_cache = {}
     for single_sct in sct:
         state = State(
             student_data=student_data,
             solution_data=solution_data,
             sct_range=single_sct.get("range"),
             reporter=rep,
+            solution_cache=solution_cache,
+            student_cache=student_cache,
+            instrumentation=instrumentation,
         )
 
-        SCT_CTX["Ex"].root_state = state
-
         try:
-            exec("\n".join(single_sct.get("sct", [])), SCT_CTX)
+            code = compile_sct(
+                single_sct.get("sct", []), instrumentation=instrumentation
+            )
+            if instrumentation is None:
+                exec(code, sct_namespace(state))
+            else:
+                instrumentation.run_sct(code, state)
         except TestFail as tf:
             return tf.payload
 
@@ -33,3 +89,44 @@ def test_exercise(sct, student_data, solution_data, success_msg=None):
         rep.success_msg = success_msg
 
     return rep.build_final_payload()
+
+
+def test_exercise_batch(
+    sct,
+    solution_data,
+    student_iter,
+    success_msg=None,
+    solution_cache=None,
+    metrics=None,
+):
+    """Grade many student submissions against the same SCT and solution.
+
+    Everything the checks derive from ``solution_data`` (cropped ranges, normalized
+    formulas, rounded values, references, ...) is computed for the first
+    submission that needs it and reused for all the others.
+    Pass a ``solution_cache`` to start from a warm cache (see ``sheetwhat.prepared``),
+    and ``metrics`` to record every run (see ``sheetwhat.metrics``).
+
+    Returns a generator that yields one payload per item of ``student_iter``, in order.
+    """
+
+    assert isinstance(sct, list)
+    assert isinstance(solution_data, dict)
+
+    if solution_cache is None:
+        solution_cache = {}
+    # graded many times, so worth storing compactly
+    solution_data = to_sheet(solution_data)
+
+    def grade():
+        for student_data in student_iter:
+            yield test_exercise(
+                sct,
+                student_data,
+                solution_data,
+                success_msg=success_msg,
+                solution_cache=solution_cache,
+                metrics=metrics,
+            )
+
+    return grade()
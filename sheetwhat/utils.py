@@ -1,76 +1,254 @@
 import re
-import copy
+import operator
+from collections.abc import Mapping
+from itertools import zip_longest
 
-RANGE_REGEX = r"([a-zA-Z]+)(\d+)(?:\:([a-zA-Z]+)(\d+))?"
+from sheetwhat.ranges import letters_to_numbers, numbers_to_letters, parse_range
+from sheetwhat.sheet import BaseGrid, SparseGrid
 
 
 def range_to_row_columns(range_spec):
-    groups = re.search(RANGE_REGEX, range_spec)
-
-    row_columns = {
-        "start_row": int(groups.group(2)) - 1,
-        "start_column": letters_to_numbers(groups.group(1)),
+    cell_range = parse_range(range_spec)
+    return {
+        "start_row": cell_range.start_row,
+        "start_column": cell_range.start_column,
+        "end_row": cell_range.end_row,
+        "end_column": cell_range.end_column,
     }
 
-    if groups.group(3) is not None:
-        row_columns["end_column"] = letters_to_numbers(groups.group(3)) + 1
-    else:
-        row_columns["end_column"] = row_columns["start_column"] + 1
 
-    if groups.group(4) is not None:
-        row_columns["end_row"] = int(groups.group(4))
-    else:
-        row_columns["end_row"] = row_columns["start_row"] + 1
+def cell_names(range_spec, indices):
+    """A1 names of cells, given their row and column indices inside a range."""
+    cell_range = parse_range(range_spec)
+    return [
+        f"{numbers_to_letters(cell_range.start_column + j)}{cell_range.start_row + i + 1}"
+        for i, j in indices
+    ]
 
-    return row_columns
 
+class RangeView:
+    """Read-only window on a 2D list, that doesn't copy any rows or cells.
 
-BASE = 26
-NUMBER_OF_FIRST = ord("A")
+    It behaves like the list of lists you get by slicing the window out of the
+    2D list: rows that are shorter than the window are cut short, and a window
+    below the last row looks like a single empty row (``[[]]``).
+    """
 
+    __slots__ = ("array_2d", "start_row", "end_row", "start_column", "end_column")
 
-def letters_to_numbers(letters):
-    letters_normalized = letters.upper()
-    letters_length = len(letters_normalized)
-    return (
-        sum(
-            [
-                (ord(letter) - NUMBER_OF_FIRST + 1)
-                * BASE ** (letters_length - index - 1)
-                for index, letter in enumerate(letters_normalized)
-            ]
-        )
-        - 1
-    )
+    def __init__(self, array_2d, start_row, end_row, start_column, end_column):
+        self.array_2d = array_2d
+        self.start_row = start_row
+        if end_row is None or end_row > len(array_2d):
+            end_row = len(array_2d)
+        self.end_row = max(start_row, end_row)
+        self.start_column = start_column
+        self.end_column = end_column
 
+    def _rows(self):
+        return (self.array_2d[i] for i in range(self.start_row, self.end_row))
 
-def crop_by_range(array_2d, range_spec):
-    row_columns = range_to_row_columns(range_spec)
-    row_range = array_2d[row_columns["start_row"] : row_columns["end_row"]]
+    def _columns(self, row):
+        end_column = self.end_column
+        if end_column is None or end_column > len(row):
+            end_column = len(row)
+        return range(self.start_column, max(self.start_column, end_column))
+
+    def _windows(self):
+        """Pairs of an original row and the column indices in the window."""
+        if self.end_row == self.start_row:
+            return iter([([], range(0))])
+        if isinstance(self.array_2d, BaseGrid):
+            return ((row, range(len(row))) for row in self._window_rows())
+        return ((row, self._columns(row)) for row in self._rows())
+
+    def _window_rows(self):
+        """The rows of the window, as new lists of cells."""
+        if self.end_row == self.start_row:
+            return [[]]
+        if isinstance(self.array_2d, BaseGrid):
+            # cut out from the columns at once, rather than cell by cell
+            return self.array_2d.window(
+                self.start_row, self.end_row, self.start_column, self.end_column
+            )
+        return (row[self.start_column : self.end_column] for row in self._rows())
+
+    def lazy_rows(self):
+        """The rows of the window one by one, as new lists of cells.
+
+        Nothing is cut out before a row is needed; for a ``SparseGrid``, only the
+        rows that have cells are.
+        """
+        if self.end_row == self.start_row:
+            return iter([[]])
+        if isinstance(self.array_2d, SparseGrid):
+            return iter(self.present_rows().values())
+        return (row[self.start_column : self.end_column] for row in self._rows())
+
+    def present_rows(self):
+        """Rows of the window that can hold cells, by index; the others are empty.
+
+        For a ``SparseGrid``, only the rows that have cells are cut out.
+        """
+        if self.end_row > self.start_row and isinstance(self.array_2d, BaseGrid):
+            return self.array_2d.present_rows(
+                self.start_row, self.end_row, self.start_column, self.end_column
+            )
+        return dict(enumerate(self._window_rows()))
+
+    @property
+    def shape(self):
+        """Number of rows and columns, or None if the rows differ in length."""
+        n_rows = self.end_row - self.start_row
+        if n_rows > 0 and isinstance(self.array_2d, SparseGrid):
+            present_rows = self.present_rows()
+            lengths = {len(row) for row in present_rows.values()}
+            if len(present_rows) < n_rows:
+                lengths.add(0)
+            return (n_rows, lengths.pop()) if len(lengths) == 1 else None
+        return shape_2d(columns for row, columns in self._windows())
+
+    def n_cells(self):
+        """Number of cells in the window, counted without cutting them out."""
+        if self.end_row == self.start_row:
+            return 0
+        if isinstance(self.array_2d, SparseGrid):
+            return sum(map(len, self.present_rows().values()))
+        return sum(len(self._columns(row)) for row in self._rows())
+
+    def __len__(self):
+        return max(self.end_row - self.start_row, 1)
 
-    if len(row_range) == 0:
-        return [[]]
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_list()[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("RangeView index out of range")
+        if self.end_row == self.start_row:
+            return []
+        row = self.array_2d[self.start_row + index]
+        return row[self.start_column : self.end_column]
 
-    return copy.deepcopy(
-        [
-            array[row_columns["start_column"] : row_columns["end_column"]]
-            for array in row_range
-        ]
+    def __iter__(self):
+        return iter(self._window_rows())
+
+    def cells(self):
+        """Iterate over all cells in the window, row by row."""
+        rows = self.present_rows().values() if is_sparse_view(self) else self
+        for row in rows:
+            yield from row
+
+    def map(self, func):
+        """Apply ``func`` to every cell, and return the result as a 2D list.
+
+        On a ``SparseGrid``, the result is a ``RangeView`` on a new ``SparseGrid``,
+        and only the cells of the rows that have cells are mapped; like in any
+        ``SparseGrid``, cells that ``func`` maps to None are left out.
+        """
+        if is_sparse_view(self):
+            rows = {
+                i: [func(cell) for cell in row]
+                for i, row in self.present_rows().items()
+            }
+            n_rows = self.end_row - self.start_row
+            return RangeView(SparseGrid.from_rows(rows, n_rows), 0, n_rows, 0, None)
+        return [[func(cell) for cell in row] for row in self._window_rows()]
+
+    def to_list(self):
+        return list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, RangeView):
+            other_windows = other._windows()
+        elif isinstance(other, list):
+            other_windows = ((row, range(len(row))) for row in other)
+        else:
+            return NotImplemented
+
+        missing = object()
+        for window, other_window in zip_longest(
+            self._windows(), other_windows, fillvalue=missing
+        ):
+            if window is missing or other_window is missing:
+                return False
+            (row, columns), (other_row, other_columns) = window, other_window
+            if len(columns) != len(other_columns):
+                return False
+            for column, other_column in zip(columns, other_columns):
+                if row[column] != other_row[other_column]:
+                    return False
+        return True
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"RangeView({self.to_list()!r})"
+
+
+def shape_2d(array_2d):
+    """Number of rows and columns of a 2D list, or None if it's ragged."""
+    if isinstance(array_2d, RangeView):
+        return array_2d.shape
+    n_rows, n_columns = 0, None
+    for row in array_2d:
+        if n_columns is None:
+            n_columns = len(row)
+        elif len(row) != n_columns:
+            return None
+        n_rows += 1
+    return n_rows, n_columns or 0
+
+
+def view_by_range(array_2d, range_spec):
+    cell_range = parse_range(range_spec)
+    return RangeView(
+        array_2d,
+        cell_range.start_row,
+        cell_range.end_row,
+        cell_range.start_column,
+        cell_range.end_column,
     )
 
 
+def crop_by_range(array_2d, range_spec):
+    # the cells are shared with array_2d, only the window itself is new
+    return view_by_range(array_2d, range_spec).to_list()
+
+
 def is_empty(x):
-    if isinstance(x, list):
-        return all([is_empty(el) for el in x])
-    elif isinstance(x, (str, dict)):
-        return len(x) == 0
-    else:
-        return x is None
+    """Whether ``x`` is None, an empty string or dict, or a list of empty elements.
+
+    Walks nested lists depth first and stops at the first element that isn't empty.
+    """
+    pending = [iter((x,))]
+    while pending:
+        for el in pending[-1]:
+            if el is None:
+                continue
+            elif isinstance(el, list):
+                pending.append(iter(el))
+                break
+            elif isinstance(el, RangeView):
+                pending.append(el.lazy_rows())
+                break
+            elif isinstance(el, (str, dict)):
+                if len(el) > 0:
+                    return False
+            else:
+                return False
+        else:
+            pending.pop()
+    return True
+
+
+def round_value(x, ndigits):
+    return round(x, ndigits) if isinstance(x, (int, float)) else x
 
 
 def round_array_2d(array_2d, ndigits):
-    round_value = lambda x: round(x, ndigits) if isinstance(x, (int, float)) else x
-    return map_2d(round_value, array_2d)
+    return map_2d(lambda x: round_value(x, ndigits), array_2d)
 
 
 def normalize_formula(formula):
@@ -81,13 +259,112 @@ def normalize_array_2d(array_2d):
     return map_2d(normalize_formula, array_2d)
 
 
+def cells_2d(array_2d):
+    """Iterate over all cells of a 2D array, row by row."""
+    if isinstance(array_2d, RangeView):
+        return array_2d.cells()
+    return (cell for row in array_2d for cell in row)
+
+
 def map_2d(func, array_2d):
+    if isinstance(array_2d, RangeView):
+        return array_2d.map(func)
     return [[func(cell) for cell in row] for row in array_2d]
 
 
+def is_sparse_view(array_2d):
+    return isinstance(array_2d, RangeView) and isinstance(array_2d.array_2d, SparseGrid)
+
+
+def present_rows(array_2d):
+    """Rows of a 2D array that can hold cells, by index; the others are empty."""
+    if isinstance(array_2d, RangeView):
+        return array_2d.present_rows()
+    return dict(enumerate(array_2d))
+
+
+def check_limit(limit):
+    """Raise if ``limit`` isn't a valid maximum number of mismatches to find."""
+    if limit is not None and limit < 1:
+        raise ValueError(f"The limit has to be None or at least 1, not {limit}.")
+
+
+def find_mismatches(student, solution, equal=operator.eq, limit=1):
+    """Compare two 2D arrays cell by cell, stopping at the ``limit``-th mismatch.
+
+    Returns the row and column indices of the mismatching cells, relative to
+    the arrays; a cell that only exists in one of both arrays is a mismatch too.
+    Pass ``limit=None`` to find all mismatches.
+    """
+    check_limit(limit)
+    if is_sparse_view(student) or is_sparse_view(solution):
+        # only compare the rows that have cells
+        student_rows, solution_rows = present_rows(student), present_rows(solution)
+        row_pairs = (
+            (i, student_rows.get(i, ()), solution_rows.get(i, ()))
+            for i in sorted(student_rows.keys() | solution_rows.keys())
+        )
+    else:
+        row_pairs = (
+            (i, student_row, solution_row)
+            for i, (student_row, solution_row) in enumerate(
+                zip_longest(student, solution, fillvalue=())
+            )
+        )
+
+    mismatches = []
+    missing = object()
+    for i, student_row, solution_row in row_pairs:
+        for j, (student_cell, solution_cell) in enumerate(
+            zip_longest(student_row, solution_row, fillvalue=missing)
+        ):
+            if (
+                student_cell is missing
+                or solution_cell is missing
+                or not equal(student_cell, solution_cell)
+            ):
+                mismatches.append((i, j))
+                if len(mismatches) == limit:
+                    return mismatches
+    return mismatches
+
+
 def dict_keys(*dicts):
     key_set = set()
     for dict_i in dicts:
         if isinstance(dict_i, dict):
             key_set = key_set | set(dict_i)
     return key_set
+
+
+class DataOverlay(Mapping):
+    """Read-only view on a data dict with some of its fields replaced.
+
+    Used to build the data of child states: the child shares all fields with
+    its parent, except for the ones in ``overrides``, and nothing is copied.
+    """
+
+    __slots__ = ("data", "overrides")
+
+    def __init__(self, data, overrides):
+        if isinstance(data, DataOverlay):
+            data, overrides = data.data, {**data.overrides, **overrides}
+        self.data = data
+        self.overrides = overrides
+
+    def __getitem__(self, key):
+        if key in self.overrides:
+            return self.overrides[key]
+        return self.data[key]
+
+    def __iter__(self):
+        yield from self.overrides
+        yield from (key for key in self.data if key not in self.overrides)
+
+    def __len__(self):
+        return len(self.overrides) + sum(
+            1 for key in self.data if key not in self.overrides
+        )
+
+    def __repr__(self):
+        return f"DataOverlay({dict(self)!r})"
@@ -0,0 +1,107 @@
+"""Vectorized comparison of large ranges of values, using NumPy.
+
+NumPy is an optional dependency (``pip install sheetwhat[numpy]``).
+When it's not installed, or a range is small or not rectangular, the checks
+fall back on the pure Python comparison.
+"""
+
+from importlib.util import find_spec
+from itertools import chain
+
+from sheetwhat.utils import check_limit, shape_2d
+
+# NumPy takes long to import, so it's imported for the first large range only
+HAS_NUMPY = find_spec("numpy") is not None
+np = None
+
+
+def import_numpy():
+    global np
+    if np is None:
+        import numpy
+
+        np = numpy
+    return np
+
+
+# for smaller ranges, converting to arrays costs more than it saves
+MIN_CELLS = 1000
+
+# larger ints lose precision, or overflow, when they are converted to float
+MAX_EXACT_INT = 2**53
+
+
+def is_number(x):
+    return isinstance(x, (int, float))
+
+
+def is_exact_float(x):
+    return not isinstance(x, int) or -MAX_EXACT_INT <= x <= MAX_EXACT_INT
+
+
+def can_vectorize(*arrays_2d):
+    """Whether the 2D arrays can be compared with NumPy.
+
+    NumPy has to be installed and the arrays have to be rectangular, of the same
+    shape, and have at least ``MIN_CELLS`` cells. Their ints have to fit in a float
+    exactly, as the numbers are compared as floats.
+    """
+    if not HAS_NUMPY:
+        return False
+    shapes = {shape_2d(array_2d) for array_2d in arrays_2d}
+    if len(shapes) != 1:
+        return False
+    shape = shapes.pop()
+    if shape is None or shape[0] * shape[1] < MIN_CELLS:
+        return False
+    cells = chain.from_iterable(chain.from_iterable(arrays_2d))
+    return all(map(is_exact_float, cells))
+
+
+class ValueGrid:
+    """A rectangular range of values, converted to NumPy arrays once.
+
+    Numbers are kept in a float array, all other cells (text, None, ...) in an
+    object array. Numbers that are equal are equal after rounding too, so only
+    the numbers that differ are rounded to ``ndigits``, with ``round()``, like
+    the pure Python comparison does.
+    """
+
+    def __init__(self, array_2d, ndigits):
+        np = import_numpy()
+        self.ndigits = ndigits
+        self.shape = shape_2d(array_2d)
+        self.objects = np.empty(self.shape, dtype=object)
+        for i, row in enumerate(array_2d):
+            self.objects[i, :] = row
+        cells = self.objects.ravel().tolist()
+        self.numeric = np.fromiter(map(is_number, cells), bool, len(cells)).reshape(
+            self.shape
+        )
+        self.numbers = np.zeros(self.shape, dtype=float)
+        self.numbers[self.numeric] = self.objects[self.numeric].astype(float)
+
+    def mismatches(self, other, limit=None):
+        """Row and column indices of the cells that differ from ``other``."""
+        check_limit(limit)
+        np = import_numpy()
+        different = self.numeric != other.numeric
+        both_numeric = self.numeric & other.numeric
+        different[both_numeric] = (
+            self.numbers[both_numeric] != other.numbers[both_numeric]
+        )
+        neither_numeric = ~(self.numeric | other.numeric)
+        different[neither_numeric] = (
+            self.objects[neither_numeric] != other.objects[neither_numeric]
+        )
+
+        mismatches = []
+        for i, j in np.argwhere(different).tolist():
+            if both_numeric[i, j]:
+                rounded = round(self.objects[i, j], self.ndigits)
+                if rounded == round(other.objects[i, j], other.ndigits):
+                    continue
+            mismatches.append((i, j))
+            if len(mismatches) == limit:
+                break
+        return mismatches
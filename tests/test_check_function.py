@@ -61,3 +61,20 @@ def test_check_function_normalize(user_data_normalize, sct_range, function, corr
     s = setup_state(user_data_normalize, user_data_normalize, sct_range)
     with verify_success(correct):
         check_function(s, name=function)
+
+
+@pytest.mark.parametrize(
+    "formula, function, correct",
+    [
+        ("=SUMIF(A1:A3, 1)", "SUM", False),
+        ("=SUMIF(A1:A3, 1)", "SUMIF", True),
+        ('="SUM(A1)"', "SUM", False),
+        ("=ROUND(SUM(A1:A3), 2)", "SUM", True),
+        ("SUM(A1:A3)", "SUM", False),
+    ],
+)
+def test_check_function_parsed(formula, function, correct):
+    user_data = {"formulas": [[formula]]}
+    s = setup_state(user_data, user_data, "A1")
+    with verify_success(correct):
+        check_function(s, name=function)
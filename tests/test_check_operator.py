@@ -57,3 +57,20 @@ def test_check_operator_normalize(user_data_normalize, sct_range, operator, corr
     s = setup_state(user_data_normalize, user_data_normalize, sct_range)
     with verify_success(correct):
         check_operator(s, operator=operator)
+
+
+@pytest.mark.parametrize(
+    "formula, operator, correct",
+    [
+        ('="1+1"', "+", False),
+        ("=A1<>B1", "<>", True),
+        ("=A1<>B1", "<", False),
+        ("=-A1", "-", True),
+        ("=A1%", "%", True),
+    ],
+)
+def test_check_operator_parsed(formula, operator, correct):
+    user_data = {"formulas": [[formula]]}
+    s = setup_state(user_data, user_data, "A1")
+    with verify_success(correct):
+        check_operator(s, operator=operator)
@@ -0,0 +1,153 @@
+import io
+import json
+import os
+import pytest
+from sheetwhat import cli
+from sheetwhat.cli import grade_line, grade_lines, main
+from sheetwhat.prepared import prepare_solution
+
+SCT = [{"range": "A1", "sct": ["Ex().has_equal_value()"]}]
+SOLUTION_DATA = {"values": [["A"]], "formulas": [["A"]]}
+
+
+def submission(value, **kwargs):
+    student_data = {"values": [[value]], "formulas": [[value]]}
+    return json.dumps({"sct": SCT, "student_data": student_data, **kwargs})
+
+
+@pytest.fixture()
+def solutions(tmpdir):
+    tmpdir.join("exercise.json").write(
+        json.dumps({"sct": SCT, "solution_data": SOLUTION_DATA, "success_msg": "Yes!"})
+    )
+    prepare_solution(SCT, SOLUTION_DATA).save(str(tmpdir.join("exercise.sheetwhat")))
+    yield str(tmpdir)
+    cli._solutions.clear()
+
+
+@pytest.fixture()
+def lines():
+    return [
+        submission("A", solution_data=SOLUTION_DATA, id=1),
+        submission("B", solution_data=SOLUTION_DATA, id=2),
+        "",
+        "{not json",
+        submission("A", solution="exercise.json"),
+        submission("B", solution="exercise.sheetwhat"),
+        submission("A", solution="missing.json"),
+        json.dumps({"student_data": {"values": [["A"]]}, "solution": "exercise.json"}),
+    ]
+
+
+def check_payloads(payloads):
+    assert [payload["correct"] for payload in payloads] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+        False,
+        True,
+    ]
+    assert [payload.get("id") for payload in payloads[:3]] == [1, 2, None]
+    assert payloads[2]["error"].startswith("JSONDecodeError")
+    assert payloads[3]["message"] == "Yes!"
+    assert "error" not in payloads[4]
+    assert payloads[5]["error"].startswith("FileNotFoundError")
+    # the SCT of the solution file is used
+    assert payloads[6]["message"] == "Yes!"
+
+
+def test_grade_lines(solutions, lines):
+    check_payloads(list(grade_lines(lines, solutions_dir=solutions)))
+
+
+def test_grade_lines_jobs(solutions, lines):
+    payloads = grade_lines(lines * 5, solutions_dir=solutions, jobs=2, window=3)
+    check_payloads(list(payloads)[:7])
+
+
+def test_solution_file_loaded_once(solutions, lines, monkeypatch):
+    loaded = []
+    original = cli.load_solution_file
+
+    def load_solution_file(path):
+        if path not in cli._solutions:
+            loaded.append(path)
+        return original(path)
+
+    monkeypatch.setattr(cli, "load_solution_file", load_solution_file)
+    list(grade_lines(lines * 3, solutions_dir=solutions))
+    # files that failed to load are tried again
+    assert [os.path.basename(path) for path in loaded] == [
+        "exercise.json",
+        "exercise.sheetwhat",
+        "missing.json",
+        "missing.json",
+        "missing.json",
+    ]
+
+
+def test_main_stdin(solutions, lines, monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(lines)))
+    main(["grade", "--solutions", solutions])
+    output = capsys.readouterr().out
+    check_payloads([json.loads(line) for line in output.splitlines()])
+
+
+def test_main_files(solutions, lines, tmpdir):
+    input_file = tmpdir.join("submissions.jsonl")
+    input_file.write("\n".join(lines))
+    output_file = tmpdir.join("payloads.jsonl")
+    main(
+        [
+            "grade",
+            str(input_file),
+            "-o",
+            str(output_file),
+            "-j",
+            "2",
+            "--solutions",
+            solutions,
+        ]
+    )
+    check_payloads([json.loads(line) for line in output_file.readlines()])
+
+
+def grade_or_crash(line, solutions_dir):
+    if line == "crash":
+        # like a worker that runs out of memory
+        os._exit(1)
+    return grade_line(line, solutions_dir)
+
+
+def test_grade_lines_worker_crash(monkeypatch):
+    # submitted to the workers by name, so it has to be a module-level function
+    monkeypatch.setattr(cli, "grade_line", grade_or_crash)
+    lines = [submission("A", solution_data=SOLUTION_DATA)] * 3
+    lines = lines + ["crash"] + lines * 3
+    payloads = list(grade_lines(lines, jobs=2, window=2))
+    assert len(payloads) == len(lines)
+    assert payloads[3]["error"].startswith("BrokenProcessPool")
+    # the lines graded by the same pool may fail too, the others go to a new pool
+    assert all(payload["correct"] or "error" in payload for payload in payloads)
+    assert payloads[-1]["correct"]
+
+
+def test_main_invalid_jobs():
+    with pytest.raises(SystemExit):
+        main(["grade", "-j", "0"])
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["../exercise.sheetwhat", "sub/../../exercise.sheetwhat", "/etc/passwd", "link"],
+)
+def test_solution_outside_solutions_dir(tmpdir, path):
+    solutions = tmpdir.mkdir("solutions")
+    prepare_solution(SCT, SOLUTION_DATA).save(str(tmpdir.join("exercise.sheetwhat")))
+    solutions.join("link").mksymlinkto(tmpdir.join("exercise.sheetwhat"))
+    line = submission("A", solution=path)
+    (payload,) = grade_lines([line], solutions_dir=str(solutions))
+    assert payload["error"].startswith("ValueError")
+    assert "not in the solutions directory" in payload["error"]
@@ -0,0 +1,118 @@
+import pytest
+from sheetwhat.checks.diff import (
+    ANY,
+    CHANGED,
+    EXTRA,
+    LENGTH,
+    MISSING,
+    SET,
+    Difference,
+    as_path,
+    diff_structures,
+)
+
+
+@pytest.fixture()
+def structure():
+    return {
+        "source": {"startRowIndex": 0, "endRowIndex": 10},
+        "rows": [{"sortOrder": "ASCENDING"}, {"sortOrder": "DESCENDING"}],
+        "criteria": {"1": {"visibleValues": ["a", "b"]}},
+        "values": [{"formula": "=a/b"}],
+    }
+
+
+def test_diff_equal(structure):
+    diff = diff_structures(structure, {**structure})
+    assert not diff
+    assert list(diff) == []
+    assert not diff.differs("source")
+
+
+@pytest.mark.parametrize(
+    "student, solution, differences",
+    [
+        ({"a": 1}, {"a": 2}, [Difference(CHANGED, ("a",), 1, 2)]),
+        ({"a": {"b": 1}}, {"a": {"b": 2}}, [Difference(CHANGED, ("a", "b"), 1, 2)]),
+        ({}, {"a": 1}, [Difference(MISSING, (), {}, {"a": 1})]),
+        (
+            {"a": 2, "c": None},
+            {"a": None, "b": 1, "c": 1.5},
+            [
+                Difference(EXTRA, ("a",), 2, None),
+                Difference(MISSING, ("b",), None, 1),
+                Difference(MISSING, ("c",), None, 1.5),
+            ],
+        ),
+        ({"a": [1]}, {"a": []}, [Difference(EXTRA, ("a",), [1], [])]),
+        ({"a": None, "b": 1}, {"b": 1}, [Difference(CHANGED, ("a",), None, None)]),
+        (
+            {"a": [1, 3]},
+            {"a": [2]},
+            [
+                Difference(CHANGED, ("a", 0), 1, 2),
+                Difference(LENGTH, ("a",), [1, 3], [2]),
+            ],
+        ),
+        ({"a": [1]}, {"a": {"b": 1}}, [Difference(CHANGED, ("a",), [1], {"b": 1})]),
+    ],
+)
+def test_diff_kinds(student, solution, differences):
+    assert sorted(diff_structures(student, solution)) == sorted(differences)
+
+
+def test_diff_schema(structure):
+    student = {
+        **structure,
+        "criteria": {"1": {"visibleValues": ["b", "a"]}},
+        "values": [{"formula": "= A / B"}],
+    }
+    schema = {
+        "criteria": {ANY: {"visibleValues": SET}},
+        "values": {ANY: {"formula": lambda x, y: x.lower().replace(" ", "") == y}},
+    }
+    assert diff_structures(student, structure)
+    assert not diff_structures(student, structure, schema)
+
+    student["criteria"]["1"]["visibleValues"] = ["a"]
+    assert list(diff_structures(student, structure, schema)) == [
+        Difference(SET, ("criteria", "1", "visibleValues"), ["a"], ["a", "b"])
+    ]
+
+
+@pytest.mark.parametrize(
+    "path, differs",
+    [
+        ((), True),
+        ("rows", True),
+        (("rows", ["sortOrder"]), True),
+        (("rows", 0), False),
+        (("rows", 1, "sortOrder"), True),
+        ("source", False),
+        ("source.startRowIndex", False),
+        ("criteria.1.visibleValues", True),
+        ("values", True),
+        ("values.0.formula", True),
+    ],
+)
+def test_diff_differs(structure, path, differs):
+    student = {
+        **structure,
+        "rows": [{"sortOrder": "ASCENDING"}, {"sortOrder": "ASCENDING"}],
+        "criteria": {"1": {"visibleValues": ["a", "c"]}},
+        "values": None,
+    }
+    assert diff_structures(student, structure).differs(path) == differs
+
+
+@pytest.mark.parametrize(
+    "path, tuple_path",
+    [
+        ("spec.title", ("spec", "title")),
+        (("rows", ["sortOrder"]), ("rows",)),
+        (("spec.basicChart.series", [["a"]]), ("spec", "basicChart", "series")),
+        ([("a", "b")], ()),
+    ],
+)
+def test_as_path(path, tuple_path):
+    assert as_path(path) == tuple_path
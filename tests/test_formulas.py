@@ -0,0 +1,92 @@
+import pytest
+from sheetwhat.formulas import (
+    Token,
+    Call,
+    BinaryOp,
+    UnaryOp,
+    Reference,
+    Name,
+    Literal,
+    Array,
+    tokenize,
+    parse_formula,
+    function_names,
+    operators,
+    references,
+)
+
+
+def test_tokenize():
+    assert tokenize('SUM(A1:B2, "x")') == (
+        Token("function", "SUM"),
+        Token("open", "("),
+        Token("reference", "A1:B2"),
+        Token("separator", ","),
+        Token("string", '"x"'),
+        Token("close", ")"),
+    )
+
+
+@pytest.mark.parametrize(
+    "formula, tree",
+    [
+        ("=1", Literal(1)),
+        ("=1.5", Literal(1.5)),
+        ('="a ""b"""', Literal('a "b"')),
+        ("=true", Literal(True)),
+        ("=#N/A", Literal("#N/A")),
+        ("=$A$1", Reference("$A$1")),
+        ("='My sheet'!A1:B2", Reference("'My sheet'!A1:B2")),
+        ("=A:B", Reference("A:B")),
+        ("=my_range", Name("my_range")),
+        ("=1+2*3", BinaryOp("+", Literal(1), BinaryOp("*", Literal(2), Literal(3)))),
+        ("=(1+2)*3", BinaryOp("*", BinaryOp("+", Literal(1), Literal(2)), Literal(3))),
+        ("=1-2-3", BinaryOp("-", BinaryOp("-", Literal(1), Literal(2)), Literal(3))),
+        ("=-A1^2", BinaryOp("^", UnaryOp("-", Reference("A1")), Literal(2))),
+        ("=A1%", UnaryOp("%", Reference("A1"))),
+        (
+            '=A1&"x"=B1',
+            BinaryOp(
+                "=", BinaryOp("&", Reference("A1"), Literal("x")), Reference("B1")
+            ),
+        ),
+        ("=NOW()", Call("NOW", ())),
+        ("=IF(A1,,1)", Call("IF", (Reference("A1"), Literal(None), Literal(1)))),
+        ("={1,2;3,4}", Array(((Literal(1), Literal(2)), (Literal(3), Literal(4))))),
+    ],
+)
+def test_parse_formula(formula, tree):
+    assert parse_formula(formula).tree == tree
+
+
+@pytest.mark.parametrize("formula", ["1+1", "=1+", "=SUM(A1", "=(1))", "=1 2", ""])
+def test_parse_formula_no_tree(formula):
+    assert parse_formula(formula).tree is None
+
+
+@pytest.mark.parametrize("value", ["SUM(A1)", 3, None])
+def test_queries_not_formula(value):
+    assert function_names(value) == ()
+    assert operators(value) == ()
+    assert references(value) == ()
+
+
+def test_parse_formula_cached():
+    assert parse_formula("=SUM(A1:A3)") is parse_formula("=SUM(A1:A3)")
+
+
+@pytest.mark.parametrize(
+    "formula, names, ops, refs",
+    [
+        ('=SUMIF(A1:A3, ">1")', ("SUMIF",), (), ("A1:A3",)),
+        ("=sum(A1) + Sum(B1)", ("SUM", "SUM"), ("+",), ("A1", "B1")),
+        ('="SUM(A1)-B1"', (), (), ()),
+        ("=LOG10(100)*-2", ("LOG10",), ("*", "-"), ()),
+        ("=IF(A1<>B1, 1, 0)", ("IF",), ("<>",), ("A1", "B1")),
+        ("=SUM(A1, B1", ("SUM",), (), ("A1", "B1")),
+    ],
+)
+def test_queries(formula, names, ops, refs):
+    assert function_names(formula) == names
+    assert operators(formula) == ops
+    assert references(formula) == refs
@@ -12,6 +12,7 @@ from tests.helper import (
 
 from sheetwhat.checks import has_equal_charts
 
+
 # Fixtures
 @pytest.fixture()
 def charts():
@@ -360,3 +361,65 @@ def test_check_charts_trans_on_solution(solution_data, trans, correct):
     s = setup_state(user_data, solution_data, "A1")
     with verify_success(correct):
         has_equal_charts(s)
+
+
+@pytest.fixture()
+def dashboard_data(solution_data):
+    second_chart = deepcopy(solution_data["charts"][0])
+    second_chart["spec"]["title"] = "Second chart"
+    second_chart["spec"]["basicChart"]["chartType"] = "LINE"
+    return {**solution_data, "charts": [solution_data["charts"][0], second_chart]}
+
+
+@pytest.mark.parametrize(
+    "trans, correct, match",
+    [
+        (Identity(), True, None),
+        (
+            Mutation(["charts", 1, "spec", "title"], "Wrong"),
+            False,
+            "with the second chart:\n\n- The title is not correct.",
+        ),
+        (Mutation(["charts", 0, "spec", "title"], "Wrong"), True, None),
+        (Deletion(["charts", 1]), False, "Please create a second chart."),
+    ],
+)
+def test_check_charts_chart_index(dashboard_data, trans, correct, match):
+    user_data = trans(deepcopy(dashboard_data))
+    s = setup_state(user_data, dashboard_data, "A1")
+    with verify_success(correct, match=match):
+        has_equal_charts(s, chart_index=1)
+
+
+@pytest.mark.parametrize(
+    "trans, correct, match",
+    [
+        (Identity(), True, None),
+        (lambda data: {**data, "charts": data["charts"][::-1]}, True, None),
+        (
+            lambda data: {
+                **data,
+                "charts": [
+                    data["charts"][1],
+                    Mutation(["spec", "basicChart", "chartType"], "BAR")(
+                        data["charts"][0]
+                    ),
+                ],
+            },
+            False,
+            "with the first chart:\n\n- The chart type is not correct.",
+        ),
+        (Deletion(["charts", 0]), False, "The first chart is missing."),
+        (
+            lambda data: {**data, "charts": [*data["charts"], data["charts"][0]]},
+            False,
+            "There is 1 chart too many.",
+        ),
+        (lambda data: {**data, "charts": []}, False, "Please create a chart."),
+    ],
+)
+def test_check_charts_any_order(dashboard_data, trans, correct, match):
+    user_data = trans(deepcopy(dashboard_data))
+    s = setup_state(user_data, dashboard_data, "A1")
+    with verify_success(correct, match=match):
+        has_equal_charts(s, any_order=True)
@@ -4,6 +4,7 @@ from tests.helper import Identity, Mutation, setup_state, verify_success
 
 from sheetwhat.checks import has_equal_conditional_formats
 
+
 # Fixtures
 @pytest.fixture()
 def conditional_format():
@@ -149,3 +150,68 @@ def test_has_equal_conditional_formats_2(solution_data_2, trans, correct, match)
     s = setup_state(user_data, solution_data_2, "A1")
     with verify_success(correct, match=match):
         has_equal_conditional_formats(s)
+
+
+@pytest.mark.parametrize(
+    "trans, correct, match",
+    [
+        (Identity(), True, None),
+        (
+            lambda data: {
+                **data,
+                "conditionalFormats": data["conditionalFormats"][::-1],
+            },
+            True,
+            None,
+        ),
+        (
+            lambda data: {
+                **data,
+                "conditionalFormats": [
+                    data["conditionalFormats"][1],
+                    {**data["conditionalFormats"][0], "ranges": []},
+                ],
+            },
+            False,
+            "ranges of the first rule are incorrect",
+        ),
+        (
+            Mutation(
+                ["conditionalFormats", 1, "gradientRule", "minpoint", "type"], "NUMBER"
+            ),
+            False,
+            "minpoint of the second rule",
+        ),
+        (
+            lambda data: {**data, "conditionalFormats": data["conditionalFormats"][1:]},
+            False,
+            "The first rule is missing",
+        ),
+        (
+            lambda data: {
+                **data,
+                "conditionalFormats": [
+                    *data["conditionalFormats"],
+                    data["conditionalFormats"][0],
+                ],
+            },
+            False,
+            "There is 1 rule too many",
+        ),
+    ],
+)
+def test_has_equal_conditional_formats_any_order(
+    solution_data_2, trans, correct, match
+):
+    user_data = trans(deepcopy(solution_data_2))
+    s = setup_state(user_data, solution_data_2, "A1")
+    with verify_success(correct, match=match):
+        has_equal_conditional_formats(s, any_order=True)
+
+
+def test_has_equal_conditional_formats_positional(solution_data_2):
+    user_data = deepcopy(solution_data_2)
+    user_data["conditionalFormats"].reverse()
+    s = setup_state(user_data, solution_data_2, "A1")
+    with verify_success(False, match="first rule is incorrect, expected single color"):
+        has_equal_conditional_formats(s)
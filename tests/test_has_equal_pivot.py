@@ -450,3 +450,29 @@ def test_check_pivot_calculated_fields(
     s = setup_state(user_data, solution_data_calculated_field, sct_range)
     with verify_success(correct, message_contains):
         has_equal_pivot(s)
+
+
+@pytest.mark.parametrize(
+    "kwargs, correct",
+    [
+        ({}, False),
+        ({"skip_rules": ["values_formula"]}, True),
+        ({"rules": ["source", "values_length"]}, True),
+        ({"rules": ["values_formula"]}, False),
+    ],
+)
+def test_check_pivot_select_rules(solution_data_calculated_field, kwargs, correct):
+    user_data = Mutation(
+        ["pivotTables", 0, 0, "values", 0, "formula"], "=wrong_inches/days"
+    )(deepcopy(solution_data_calculated_field))
+    s = setup_state(user_data, solution_data_calculated_field, "A1")
+    with verify_success(correct):
+        has_equal_pivot(s, **kwargs)
+
+
+def test_check_pivot_unknown_rule(solution_data_calculated_field):
+    s = setup_state(
+        solution_data_calculated_field, solution_data_calculated_field, "A1"
+    )
+    with pytest.raises(ValueError, match="Unknown pivot table rules: typo"):
+        has_equal_pivot(s, skip_rules=["typo"])
@@ -59,3 +59,19 @@ def test_check_reference_normalize(solution_data_normalize, trans, sct_range, co
     s = setup_state(user_data, solution_data_normalize, sct_range)
     with verify_success(correct):
         has_equal_references(s)
+
+
+@pytest.mark.parametrize(
+    "student, solution, correct",
+    [
+        ("=B10", "=B1", False),
+        ('="B1"', "=B1", False),
+        ("=SUM(Sheet1!B1:B3)", "=SUM(B1:B3)", True),
+        ("=SUM(B1:B3)", "=LOG10(B1)", True),
+        ("=LOG10(B2)", "=LOG10(B1)", False),
+    ],
+)
+def test_check_reference_parsed(student, solution, correct):
+    s = setup_state({"formulas": [[student]]}, {"formulas": [[solution]]}, "A1")
+    with verify_success(correct):
+        has_equal_references(s)
@@ -0,0 +1,96 @@
+import subprocess
+import sys
+
+import pytest
+
+# time sheetwhat's own modules may take to import, in microseconds; generous, as
+# they take about 15ms on a laptop, this catches heavy imports creeping back in
+BUDGET = 100000
+
+# only imported when a check that needs them runs
+LAZY_MODULES = [
+    "glom",
+    "numpy",
+    "tracemalloc",
+    "sheetwhat.checks.check_funcs",
+    "sheetwhat.checks.has_equal_pivot",
+    "sheetwhat.checks.has_equal_charts",
+    "sheetwhat.checks.has_equal_conditional_formats",
+    "sheetwhat.instrumentation",
+]
+
+
+def run_import(statement):
+    """Run ``statement`` in a fresh process.
+
+    Returns the self time of the modules it imported, in microseconds (empty
+    before Python 3.7), and the names of all loaded modules; ``-X importtime``
+    misses the modules imported with ``importlib.import_module()``.
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"{statement}; import sys; print(*sys.modules)",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_time, _, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(self_time)
+    return times, set(result.stdout.split())
+
+
+def test_import_test_exercise():
+    _, modules = run_import("import sheetwhat.test_exercise")
+    assert "sheetwhat.test_exercise" in modules
+    assert [name for name in LAZY_MODULES if name in modules] == []
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="-X importtime needs 3.7")
+def test_import_time_budget():
+    times, _ = run_import("import sheetwhat.test_exercise")
+    assert "sheetwhat.test_exercise" in times
+    own_time = sum(t for name, t in times.items() if name.startswith("sheetwhat"))
+    assert own_time < BUDGET
+
+
+@pytest.mark.parametrize(
+    "name, module",
+    [
+        ("has_equal_value", "sheetwhat.checks.check_funcs"),
+        ("has_equal_pivot", "sheetwhat.checks.has_equal_pivot"),
+        ("fail", "protowhat.checks.check_logic"),
+    ],
+)
+def test_import_check(name, module):
+    _, modules = run_import(f"from sheetwhat.checks import {name}")
+    assert module in modules
+    assert "glom" not in modules
+    assert "sheetwhat.checks.has_equal_charts" not in modules
+
+
+def test_submodule_does_not_shadow_check():
+    from sheetwhat.checks.has_equal_charts import has_equal_charts as check
+    from sheetwhat.checks import has_equal_charts
+
+    assert has_equal_charts is check
+
+
+def test_lazy_attributes():
+    from sheetwhat import checks, sct_syntax
+
+    assert "has_equal_value" in dir(checks)
+    assert sct_syntax.SCT_CTX["has_equal_value"] is sct_syntax.has_equal_value
+    with pytest.raises(AttributeError):
+        checks.missing
+    with pytest.raises(AttributeError):
+        sct_syntax.missing
@@ -0,0 +1,82 @@
+import json
+import sys
+
+import pytest
+from sheetwhat.instrumentation import Instrumentation
+from sheetwhat.sct_syntax import SCT_CTX, sct_dict
+from sheetwhat.test_exercise import test_exercise as te
+
+
+@pytest.fixture()
+def data():
+    return {"values": [[1, 2], [3, 3]], "formulas": [["=A1", "=SUM(A1:A2)"], [3, 3]]}
+
+
+@pytest.fixture()
+def sct():
+    return [
+        {
+            "range": "A1:B2",
+            "sct": ["Ex().has_equal_value()", "Ex().has_equal_formula()"],
+        },
+        {
+            "range": "B1",
+            "sct": ["Ex().check_correct(has_equal_value(), check_function('SUM'))"],
+        },
+    ]
+
+
+def test_instrumentation(sct, data):
+    payload = te(sct, data, data, instrumentation=Instrumentation())
+    assert payload["correct"]
+    report = payload["instrumentation"]
+    assert json.loads(json.dumps(report)) == report
+
+    checks = report["checks"]
+    assert {name: record["calls"] for name, record in checks.items()} == {
+        "has_equal_value": 2,
+        "has_equal_formula": 1,
+        "check_correct": 1,
+        "check_function": 1,
+    }
+    assert checks["has_equal_value"]["cells"] == 5
+    assert checks["check_correct"]["cells"] == 0
+    assert checks["check_correct"]["time"] >= checks["check_function"]["time"]
+
+    assert [block["range"] for block in report["blocks"]] == ["A1:B2", "B1"]
+    assert report["time"] == sum(block["time"] for block in report["blocks"])
+    assert "peak_memory" not in checks["has_equal_value"]
+    assert report["caches"]["student"] == {"hits": 0, "misses": 9}
+
+
+def test_instrumentation_failing(sct, data):
+    student_data = {**data, "values": [[1, 2], [3, 4]]}
+    payload = te(sct, student_data, data, instrumentation=Instrumentation())
+    assert not payload["correct"]
+    report = payload["instrumentation"]
+    assert len(report["blocks"]) == 1
+    assert report["checks"]["has_equal_value"]["calls"] == 1
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 9), reason="tracemalloc.reset_peak() needs 3.9"
+)
+def test_instrumentation_memory(sct, data):
+    report = te(sct, data, data, instrumentation=Instrumentation(trace_memory=True))[
+        "instrumentation"
+    ]
+    for block in report["blocks"]:
+        assert block["peak_memory"] > 0
+        for record in block["checks"].values():
+            assert record["peak_memory"] > 0
+
+
+@pytest.mark.skipif(sys.version_info >= (3, 9), reason="tracing memory works")
+def test_instrumentation_memory_unsupported():
+    with pytest.raises(ValueError):
+        Instrumentation(trace_memory=True)
+
+
+def test_no_instrumentation(sct, data):
+    assert "instrumentation" not in te(sct, data, data)
+    assert SCT_CTX["has_equal_value"].__wrapped__ is sct_dict["has_equal_value"]
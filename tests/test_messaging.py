@@ -79,3 +79,17 @@ def test_format_string_messaging():
     )
     with pytest.raises(TF, match=r"Check cell `A1` again."):
         check_operator(s, operator="<", missing_msg="Check cell `{range}` again.")
+
+
+def test_has_equal_value_cells():
+    s = setup_state({"values": [[1, 2], [3, 4]]}, {"values": [[1, 0], [0, 4]]}, "A1:B2")
+    with pytest.raises(TF, match=r"Check `B1`, `A2` in `A1:B2`."):
+        has_equal_value(
+            s, incorrect_msg="Check {cells} in `{range}`.", max_mismatches=None
+        )
+
+
+def test_has_equal_formula_cell():
+    s = setup_state({"formulas": [["=1", "=2"]]}, {"formulas": [["=1", "=3"]]}, "A1:B1")
+    with pytest.raises(TF, match=r"Check cell `B1`."):
+        has_equal_formula(s, incorrect_msg="Check cell `{cell}`.")
@@ -0,0 +1,151 @@
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sheetwhat.instrumentation import Instrumentation
+from sheetwhat.metrics import Metrics, MetricsFileWriter
+from sheetwhat.sct_cache import sct_cache
+from sheetwhat.test_exercise import test_exercise as te
+from sheetwhat.test_exercise import test_exercise_batch as te_batch
+
+
+@pytest.fixture()
+def sct():
+    return [
+        {"range": "A1", "sct": ["Ex().has_equal_value()"]},
+        {"range": "A1:B1", "sct": ["Ex().has_equal_formula()"]},
+    ]
+
+
+@pytest.fixture()
+def solution_data():
+    return {"values": [["A", "A"]], "formulas": [["=A1", "=A1"]]}
+
+
+def samples(text):
+    return dict(
+        line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#")
+    )
+
+
+def test_metrics(sct, solution_data):
+    metrics = Metrics(buckets=[0.5, 1e9])
+    students = [solution_data, {**solution_data, "values": [["B", "A"]]}]
+    payloads = list(te_batch(sct, solution_data, students, metrics=metrics))
+    assert [payload["correct"] for payload in payloads] == [True, False]
+    assert "instrumentation" not in payloads[0]
+
+    text = metrics.render()
+    assert "# TYPE sheetwhat_grading_seconds histogram\n" in text
+    result = samples(text)
+    assert result['sheetwhat_submissions_total{result="correct"}'] == "1"
+    assert result['sheetwhat_submissions_total{result="incorrect"}'] == "1"
+    assert result['sheetwhat_grading_seconds_bucket{le="1000000000.0"}'] == "2"
+    assert result['sheetwhat_grading_seconds_bucket{le="+Inf"}'] == "2"
+    assert result["sheetwhat_grading_seconds_count"] == "2"
+    assert result['sheetwhat_check_seconds_count{check="has_equal_value"}'] == "2"
+    assert result['sheetwhat_check_seconds_count{check="has_equal_formula"}'] == "1"
+    hits = 'sheetwhat_cache_lookups_total{cache="solution",result="hit"}'
+    misses = 'sheetwhat_cache_lookups_total{cache="solution",result="miss"}'
+    assert int(result[hits]) > 0
+    assert int(result[misses]) > 0
+    # the second submission reuses the code of both SCTs
+    sct_hits = 'sheetwhat_cache_lookups_total{cache="sct",result="hit"}'
+    assert int(result[sct_hits]) >= 2
+
+
+def test_metrics_sct_cache_per_instance(sct, solution_data):
+    te(sct, solution_data, solution_data)
+    metrics = Metrics()
+    te(sct, solution_data, solution_data, metrics=metrics)
+    sct_cache.clear()
+    te(sct, solution_data, solution_data, metrics=metrics)
+    result = samples(metrics.render())
+    # only the lookups of the runs recorded by this instance
+    assert result['sheetwhat_cache_lookups_total{cache="sct",result="hit"}'] == "2"
+    assert result['sheetwhat_cache_lookups_total{cache="sct",result="miss"}'] == "2"
+    assert samples(Metrics().render()) == {}
+
+
+def test_metrics_error(solution_data):
+    metrics = Metrics()
+    with pytest.raises(SyntaxError):
+        te(
+            [{"range": "A1", "sct": ["Ex(("]}],
+            solution_data,
+            solution_data,
+            metrics=metrics,
+        )
+    assert (
+        samples(metrics.render())['sheetwhat_submissions_total{result="error"}'] == "1"
+    )
+
+
+def test_metrics_with_instrumentation(sct, solution_data):
+    metrics = Metrics()
+    payload = te(
+        sct,
+        solution_data,
+        solution_data,
+        instrumentation=Instrumentation(),
+        metrics=metrics,
+    )
+    assert payload["instrumentation"]["checks"]["has_equal_value"]["calls"] == 1
+    assert 'check="has_equal_value"' in metrics.render()
+
+
+def test_metrics_threads(sct, solution_data):
+    metrics = Metrics()
+
+    def grade(_):
+        return te(sct, solution_data, solution_data, metrics=metrics)["correct"]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert all(executor.map(grade, range(40)))
+    result = samples(metrics.render())
+    assert result['sheetwhat_submissions_total{result="correct"}'] == "40"
+    assert result["sheetwhat_grading_seconds_count"] == "40"
+
+
+def test_metrics_thread_per_request():
+    metrics = Metrics(buckets=[1])
+
+    def handle_request():
+        metrics.inc("sheetwhat_submissions_total", (("result", "correct"),))
+        metrics.observe("sheetwhat_grading_seconds", 0.5)
+
+    for _ in range(500):
+        thread = threading.Thread(target=handle_request)
+        thread.start()
+        thread.join()
+    # the shards of ended threads are added up
+    assert len(metrics._shards) == 0
+    handle_request()
+    assert len(metrics._shards) == 1
+    result = samples(metrics.render())
+    assert result['sheetwhat_submissions_total{result="correct"}'] == "501"
+    assert result['sheetwhat_grading_seconds_bucket{le="1.0"}'] == "501"
+    assert result["sheetwhat_grading_seconds_sum"] == "250.5"
+
+
+def test_render_labels():
+    metrics = Metrics(buckets=[1])
+    metrics.inc("sheetwhat_submissions_total", (("result", 'a "b"\\\n'),), 3)
+    metrics.observe("sheetwhat_grading_seconds", 1)
+    metrics.observe("sheetwhat_grading_seconds", 2)
+    result = samples(metrics.render())
+    assert result == {
+        'sheetwhat_submissions_total{result="a \\"b\\"\\\\\\n"}': "3",
+        'sheetwhat_grading_seconds_bucket{le="1.0"}': "1",
+        'sheetwhat_grading_seconds_bucket{le="+Inf"}': "2",
+        "sheetwhat_grading_seconds_sum": "3.0",
+        "sheetwhat_grading_seconds_count": "2",
+    }
+
+
+def test_metrics_file_writer(tmpdir):
+    metrics = Metrics()
+    path = tmpdir.join("sheetwhat.prom")
+    with MetricsFileWriter(metrics, str(path), interval=0.01):
+        metrics.inc("sheetwhat_submissions_total", (("result", "correct"),))
+    assert 'sheetwhat_submissions_total{result="correct"} 1\n' in path.read()
+    assert [p.basename for p in tmpdir.listdir()] == ["sheetwhat.prom"]
@@ -0,0 +1,82 @@
+import json
+import pytest
+from sheetwhat.parallel import grade_parallel, main
+from sheetwhat.test_exercise import test_exercise as te
+
+
+@pytest.fixture()
+def exercise():
+    return {
+        "sct": [{"range": "A1", "sct": ["Ex().has_equal_value()"]}],
+        "solution_data": {"values": [["A"]], "formulas": [["A"]]},
+    }
+
+
+@pytest.fixture()
+def submissions():
+    return [
+        {"values": [["A"]], "formulas": [["A"]]},
+        {"values": [["B"]], "formulas": [["B"]]},
+        [],  # malformed, should only affect its own payload
+        {"formulas": [["A"]]},  # no values, the SCT raises a KeyError
+        {"values": [["A"]], "formulas": [["A"]]},
+    ]
+
+
+def test_grade_parallel(exercise, submissions):
+    payloads = grade_parallel(
+        exercise["sct"],
+        exercise["solution_data"],
+        submissions,
+        max_workers=2,
+        chunksize=2,
+    )
+    assert [payload["correct"] for payload in payloads] == [
+        True,
+        False,
+        False,
+        False,
+        True,
+    ]
+    assert payloads[0] == te(exercise["sct"], submissions[0], exercise["solution_data"])
+    assert "error" not in payloads[1]
+    assert payloads[2]["error"].startswith("AssertionError")
+    assert payloads[3]["error"].startswith("KeyError")
+
+
+def test_syntax_error_isolated(exercise, submissions):
+    payloads = grade_parallel(
+        [{"range": "A1", "sct": ["Ex(.has_equal_value()"]}],
+        exercise["solution_data"],
+        submissions[:2],
+        max_workers=1,
+    )
+    assert all(payload["error"].startswith("SyntaxError") for payload in payloads)
+
+
+def test_worker_setup_error_isolated(submissions):
+    # the solution data can't be stored in a Grid
+    payloads = grade_parallel(
+        [{"range": "A1", "sct": ["Ex().has_equal_value()"]}],
+        {"values": [1]},
+        submissions[:3],
+        max_workers=2,
+        chunksize=1,
+    )
+    assert len(payloads) == 3
+    assert all(payload["error"].startswith("TypeError") for payload in payloads)
+
+
+def test_main(tmpdir, exercise, submissions):
+    exercise_file = tmpdir.join("exercise.json")
+    exercise_file.write(json.dumps(exercise))
+    submissions_file = tmpdir.join("submissions.json")
+    submissions_file.write(json.dumps(submissions[:2]))
+    output_file = tmpdir.join("payloads.json")
+
+    main(
+        [str(exercise_file), str(submissions_file), "-o", str(output_file), "-j", "2"]
+    )
+
+    payloads = json.loads(output_file.read())
+    assert [payload["correct"] for payload in payloads] == [True, False]
@@ -0,0 +1,72 @@
+import pickle
+import pytest
+from sheetwhat.prepared import PreparedSolution, prepare_solution, load_solution
+from sheetwhat.sct_cache import sct_cache
+from sheetwhat.test_exercise import test_exercise as te
+
+
+@pytest.fixture()
+def sct():
+    return [
+        {"range": "A1:B1", "sct": ["Ex().has_equal_value()"]},
+        {"range": "A1:B1", "sct": ["Ex().has_equal_formula()"]},
+        {"range": "A1:B1", "sct": ["Ex().has_equal_references()"]},
+    ]
+
+
+@pytest.fixture()
+def solution_data():
+    return {"values": [[1, 2]], "formulas": [["=SUM(C1:C3)", "=A1 + 1"]]}
+
+
+@pytest.fixture()
+def students():
+    return [
+        {"values": [[1, 2]], "formulas": [["=SUM(C1:C3)", "=A1+1"]]},
+        {"values": [[1, 3]], "formulas": [["=SUM(C1:C3)", "=A1+1"]]},
+        {"values": [[1, 2]], "formulas": [["=SUM(C1:C4)", "=A1+1"]]},
+    ]
+
+
+def test_prepare_solution(sct, solution_data):
+    prepared = prepare_solution(sct, solution_data)
+    assert ("values", "A1:B1") in prepared.solution_cache
+    assert ("formulas", "A1:B1", "normalize") in prepared.solution_cache
+    assert ("formulas", "A1:B1", "references", False) in prepared.solution_cache
+    assert "Ex().has_equal_value()" in sct_cache
+
+
+def test_prepare_solution_fails(sct, solution_data):
+    with pytest.raises(ValueError, match="doesn't pass its own SCT"):
+        prepare_solution(
+            [{"range": "A1", "sct": ["Ex().has_code('x')"]}], solution_data
+        )
+    with pytest.raises(SyntaxError):
+        prepare_solution([{"range": "A1", "sct": ["Ex(("]}], solution_data)
+
+
+def test_save_and_load(tmpdir, sct, solution_data, students):
+    path = str(tmpdir.join("exercise.sheetwhat"))
+    prepare_solution(sct, solution_data).save(path)
+    sct_cache.clear()
+
+    prepared = load_solution(path)
+    assert len(prepared.solution_cache) > 0
+    assert "Ex().has_equal_formula()" in sct_cache
+    expected = [te(sct, student_data, solution_data) for student_data in students]
+    assert [
+        prepared.test_exercise(student_data) for student_data in students
+    ] == expected
+    assert list(prepared.test_exercise_batch(students)) == expected
+
+
+def test_load_other_python(sct, solution_data, students):
+    artifact = pickle.loads(prepare_solution(sct, solution_data).dumps())
+    artifact["python"] = "other-python"
+    artifact["code"] = [b"not marshalled code"] * len(sct)
+    prepared = PreparedSolution.loads(pickle.dumps(artifact))
+    assert prepared.test_exercise(students[0])["correct"]
+
+    artifact["format"] = 0
+    with pytest.raises(ValueError, match="Unsupported prepared solution format"):
+        PreparedSolution.loads(pickle.dumps(artifact))
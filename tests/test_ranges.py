@@ -0,0 +1,72 @@
+import pytest
+from sheetwhat.ranges import (
+    CellRange,
+    parse_range,
+    parse_cell,
+    letters_to_numbers,
+    numbers_to_letters,
+)
+from sheetwhat.utils import view_by_range
+
+
+@pytest.mark.parametrize(
+    "range_spec, cell_range",
+    [
+        ("A1", CellRange(None, 0, 1, 0, 1)),
+        ("b2", CellRange(None, 1, 2, 1, 2)),
+        ("A1:B2", CellRange(None, 0, 2, 0, 2)),
+        ("B2:A1", CellRange(None, 0, 2, 0, 2)),
+        ("$A$1", CellRange(None, 0, 1, 0, 1)),
+        ("$A1:B$2", CellRange(None, 0, 2, 0, 2)),
+        ("A:A", CellRange(None, 0, None, 0, 1)),
+        ("$B:$C", CellRange(None, 0, None, 1, 3)),
+        ("3:3", CellRange(None, 2, 3, 0, None)),
+        ("$3:$4", CellRange(None, 2, 4, 0, None)),
+        ("A2:B", CellRange(None, 1, None, 0, 2)),
+        ("Sheet1!A1:B2", CellRange("Sheet1", 0, 2, 0, 2)),
+        ("'My sheet'!AA10", CellRange("My sheet", 9, 10, 26, 27)),
+        ("'Vincent''s sheet'!A:A", CellRange("Vincent's sheet", 0, None, 0, 1)),
+        (" A1 ", CellRange(None, 0, 1, 0, 1)),
+    ],
+)
+def test_parse_range(range_spec, cell_range):
+    assert parse_range(range_spec) == cell_range
+
+
+@pytest.mark.parametrize(
+    "range_spec", ["", "A", "1", "A1:", ":A1", "A1:3", "3:A1", "A:B2", "A1B2", "!A1"]
+)
+def test_parse_range_invalid(range_spec):
+    with pytest.raises(ValueError, match="is not a valid range"):
+        parse_range(range_spec)
+
+
+@pytest.mark.parametrize("number", [0, 1, 25, 26, 51, 52, 701, 702, 1247, 16383])
+def test_numbers_to_letters(number):
+    assert letters_to_numbers(numbers_to_letters(number)) == number
+
+
+@pytest.mark.parametrize(
+    "range_spec, target",
+    [
+        ("B:B", [[1], [4], [7]]),
+        ("2:2", [[3, 4, 5]]),
+        ("B2:C", [[4, 5], [7, 8]]),
+        ("Sheet1!$A$1:$B$1", [[0, 1]]),
+    ],
+)
+def test_view_by_range_unbounded(range_spec, target):
+    assert view_by_range([[0, 1, 2], [3, 4, 5], [6, 7, 8]], range_spec) == target
+
+
+@pytest.mark.parametrize(
+    "cell_name, indices", [("A1", (0, 0)), ("b3", (2, 1)), ("$AA$10", (9, 26))]
+)
+def test_parse_cell(cell_name, indices):
+    assert parse_cell(cell_name) == indices
+
+
+@pytest.mark.parametrize("cell_name", ["", "A", "1", "A0", "A1:B2", "Sheet1!A1"])
+def test_parse_cell_invalid(cell_name):
+    with pytest.raises(ValueError, match="is not a valid cell"):
+        parse_cell(cell_name)
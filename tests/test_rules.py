@@ -0,0 +1,63 @@
+import glom
+import pytest
+from sheetwhat.checks.rules import (
+    safe_glom,
+    deep_coalesce,
+    compile_spec,
+    MAX_SPECS,
+    _compile_frozen_spec,
+)
+
+
+@pytest.fixture()
+def structure():
+    return {
+        "source": {"startRowIndex": 0},
+        "rows": [{"sortOrder": "ASCENDING", "showTotals": True}, {"showTotals": False}],
+        "values": None,
+        "criteria": {"1": {"visibleValues": ["a", "b"]}},
+        "spec": {"title": None, "basicChart": {"series": [[{"a": 1}]]}},
+        "text": "abc",
+        "list": [1, {"a": 2}],
+    }
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "source",
+        "source.startRowIndex",
+        "source.endRowIndex",
+        "missing.path",
+        "criteria.1.visibleValues",
+        "spec.title",
+        "spec.title.text",
+        "text.upper",
+        "list.1.a",
+        ("rows", ["sortOrder"]),
+        ("rows", ["showTotals"]),
+        ("values", ["summarizeFunction"]),
+        ("missing", ["sortOrder"]),
+        ("criteria", ["visibleValues"]),
+        ("text", ["a"]),
+        ("list", ["a"]),
+        ("spec.basicChart.series", [["a"]]),
+    ],
+)
+@pytest.mark.parametrize("fallback", [None, "fallback"])
+def test_safe_glom_like_glom(structure, path, fallback):
+    expected = glom.glom(structure, deep_coalesce(path, fallback))
+    assert safe_glom(structure, path, fallback) == expected
+
+
+def test_compile_spec_cached():
+    spec = compile_spec(("rows", ["sortOrder"]), None)
+    assert compile_spec(("rows", ["sortOrder"]), None) is spec
+    assert compile_spec(["rows", ["sortOrder"]], None) is not spec
+    assert compile_spec("rows", []) is not compile_spec("rows", [])
+
+
+def test_compile_spec_bounded():
+    for i in range(MAX_SPECS + 10):
+        compile_spec(f"{i}.color", None)
+    assert _compile_frozen_spec.cache_info().currsize == MAX_SPECS
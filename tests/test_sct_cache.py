@@ -0,0 +1,68 @@
+import pytest
+from sheetwhat.instrumentation import Instrumentation
+from sheetwhat.sct_cache import SCTCache, compile_sct
+from sheetwhat.test_exercise import test_exercise as te
+
+
+def test_compile_once():
+    cache = SCTCache()
+    code = cache.compile("Ex().has_equal_value()")
+    assert cache.compile("Ex().has_equal_value()") is code
+    assert cache.cache_info() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 256}
+
+
+def test_compile_sct_counts_lookup():
+    cache = SCTCache()
+    instrumentation = Instrumentation()
+    code = compile_sct(["a = 1"], cache=cache, instrumentation=instrumentation)
+    assert cache.lookup("a = 1") == (code, True)
+    compile_sct(["a = 1"], cache=cache, instrumentation=instrumentation)
+    assert instrumentation.caches == {"sct": {"hits": 1, "misses": 1}}
+
+
+def test_lru_eviction():
+    cache = SCTCache(maxsize=2)
+    cache.compile("a = 1")
+    cache.compile("b = 2")
+    cache.compile("a = 1")
+    cache.compile("c = 3")
+    assert "a = 1" in cache
+    assert "b = 2" not in cache
+    assert "c = 3" in cache
+    cache.resize(1)
+    assert len(cache) == 1
+    assert "c = 3" in cache
+
+
+def test_disabled():
+    cache = SCTCache(maxsize=0)
+    cache.compile("a = 1")
+    cache.compile("a = 1")
+    assert len(cache) == 0
+    assert cache.cache_info()["misses"] == 2
+
+
+def test_compile_sct_joins_lines():
+    cache = SCTCache()
+    namespace = {}
+    exec(compile_sct(["a = 1", "b = a + 1"], cache=cache), namespace)
+    assert namespace["b"] == 2
+    assert "a = 1\nb = a + 1" in cache
+
+
+def test_syntax_error_not_cached():
+    cache = SCTCache()
+    with pytest.raises(SyntaxError):
+        cache.compile("Ex(.has_code()")
+    assert len(cache) == 0
+
+
+def test_test_exercise_reuses_code():
+    from sheetwhat.sct_cache import sct_cache
+
+    sct = [{"range": "A1", "sct": ["Ex().has_equal_value()", "# reuse test"]}]
+    data = {"values": [["A"]], "formulas": [["A"]]}
+    te(sct=sct, student_data=data, solution_data=data)
+    hits = sct_cache.hits
+    assert te(sct=sct, student_data=data, solution_data=data)["correct"]
+    assert sct_cache.hits == hits + 1
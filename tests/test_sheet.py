@@ -0,0 +1,219 @@
+import pickle
+import pytest
+from array import array
+from sheetwhat.sheet import (
+    Grid,
+    GridRow,
+    SparseColumn,
+    SparseGrid,
+    compact_column,
+    parse_sparse,
+    to_sheet,
+)
+from sheetwhat.utils import view_by_range, is_empty, map_2d, find_mismatches
+from sheetwhat.test_exercise import test_exercise as te
+
+
+@pytest.fixture()
+def array_2d():
+    return [
+        [1, 1.5, "a", None, "=A1", True],
+        [2, 2.5, "b", None, 7],
+        [3, 3.5, "a", 4, "=A3", False],
+        [],
+        [5, None, "c"],
+    ]
+
+
+@pytest.mark.parametrize(
+    "cells, storage",
+    [
+        ([1, 2, 3], array),
+        ([1.5, 2.5, 3.0], array),
+        ([1, 2.5, 3], list),
+        ([True, False, True], list),
+        ([2**70, 1, 2], list),
+        (["a", None, "b"], list),
+        ([None, None, "a"], SparseColumn),
+        ([None, None, None], SparseColumn),
+    ],
+)
+def test_compact_column(cells, storage):
+    column = compact_column(cells)
+    assert isinstance(column, storage)
+    assert [column[i] for i in range(len(cells))] == cells
+    assert list(column[1:3]) == cells[1:3]
+
+
+def test_grid(array_2d):
+    grid = Grid(array_2d)
+    assert grid == array_2d
+    assert grid.to_list() == array_2d
+    assert len(grid) == len(array_2d)
+    assert [len(row) for row in grid] == [len(row) for row in array_2d]
+    assert isinstance(grid[0], GridRow)
+    assert grid[-1] == [5, None, "c"]
+    assert grid[0][1:3] == [1.5, "a"]
+    assert grid[2][-1] is False
+    with pytest.raises(IndexError):
+        grid[1][5]
+    with pytest.raises(IndexError):
+        grid[5]
+    assert Grid([]) == []
+
+
+def test_grid_interns_text():
+    grid = Grid([["".join(["te", "xt"])], ["".join(["t", "ext"])], [None]])
+    assert grid[0][0] is grid[1][0]
+
+
+@pytest.mark.parametrize(
+    "range_spec",
+    ["A1", "A1:F5", "B2:C3", "D1:F3", "C4:E5", "F:F", "4:4", "A10:B12", "G1:H2"],
+)
+@pytest.mark.parametrize(
+    "to_grid", [Grid, lambda array_2d: SparseGrid(cells(array_2d))]
+)
+def test_range_view_on_grid(array_2d, range_spec, to_grid):
+    grid_view = view_by_range(to_grid(array_2d), range_spec)
+    list_view = view_by_range(array_2d, range_spec)
+    assert grid_view == list_view
+    assert grid_view.to_list() == list_view.to_list()
+    assert grid_view.shape == list_view.shape
+    assert list(grid_view.cells()) == list(list_view.cells())
+    assert is_empty(grid_view) == is_empty(list_view)
+    assert map_2d(str, grid_view) == map_2d(str, list_view)
+    for other in [list_view, list_view.to_list(), [[1, 2], [3]]]:
+        assert find_mismatches(grid_view, other, limit=None) == find_mismatches(
+            list_view, other, limit=None
+        )
+        assert find_mismatches(other, grid_view, limit=None) == find_mismatches(
+            other, list_view, limit=None
+        )
+
+
+def cells(array_2d):
+    return {
+        f"{chr(ord('A') + j)}{i + 1}": cell
+        for i, row in enumerate(array_2d)
+        for j, cell in enumerate(row)
+    }
+
+
+def test_sparse_grid(array_2d):
+    grid = SparseGrid(cells(array_2d))
+    assert grid == array_2d
+    assert len(grid) == 5
+    assert grid[3] == []
+    assert grid[4] == [5, None, "c"]
+    assert SparseGrid({}) == []
+
+
+def test_sparse_grid_far_down():
+    grid = SparseGrid({"A1": 1, "B1": 2, "A1000000": "far", "C999999": ""})
+    assert len(grid) == 1000000
+    assert not is_empty(view_by_range(grid, "A1:C1000000"))
+    assert is_empty(view_by_range(grid, "A2:C999999"))
+    assert view_by_range(grid, "A2:C999999").shape is None
+    assert view_by_range(grid, "A1:A1000000").present_rows() == {
+        0: [1],
+        999998: [None],
+        999999: ["far"],
+    }
+    assert find_mismatches(view_by_range(grid, "A:C"), [[1, 2]], limit=None) == [
+        (999998, 0),
+        (999998, 1),
+        (999998, 2),
+        (999999, 0),
+    ]
+
+
+def test_parse_sparse():
+    data = {"values": {"cells": {"A1": 1, "B2": 2}}, "formulas": [[1], [None, 2]]}
+    parsed = parse_sparse(data)
+    assert isinstance(parsed["values"], SparseGrid)
+    assert parsed["values"] == [[1], [None, 2]]
+    assert parsed["formulas"] is data["formulas"]
+    assert parse_sparse({"values": [[1]]}) == {"values": [[1]]}
+    assert isinstance(to_sheet(data)["values"], SparseGrid)
+    assert isinstance(to_sheet(data)["formulas"], Grid)
+
+
+def test_to_sheet(array_2d):
+    data = {"values": array_2d, "formulas": array_2d, "charts": []}
+    sheet = to_sheet(data)
+    assert isinstance(sheet["values"], Grid)
+    assert isinstance(sheet["formulas"], Grid)
+    assert sheet["charts"] is data["charts"]
+    assert pickle.loads(pickle.dumps(sheet)) == sheet
+
+
+@pytest.mark.parametrize(
+    "sct",
+    [
+        "Ex().has_equal_value()",
+        "Ex().has_equal_formula()",
+        "Ex().has_equal_references()",
+        "Ex().check_function('SUM')",
+    ],
+)
+def test_grade_sheet(sct):
+    solution_data = {
+        "values": [[1, 2, 3], [4, 5, 9]],
+        "formulas": [[1, 2, 3], [4, 5, "=SUM(A2:B2)"]],
+    }
+    student_data = {
+        "values": [[1, 2, 3], [4, 5, 8]],
+        "formulas": [[1, 2, 3], [4, 5, "=SUM(A2:B2) - 1"]],
+    }
+    sct = [{"range": "A1:C2", "sct": [sct]}]
+    for student in [student_data, solution_data]:
+        expected = te(sct, student, solution_data)
+        assert te(sct, to_sheet(student), to_sheet(solution_data)) == expected
+        sparse_student = {field: {"cells": cells(student[field])} for field in student}
+        assert te(sct, sparse_student, solution_data) == expected
+
+
+def test_map_sparse():
+    grid = SparseGrid({"A1": 1.23456, "B1": "x", "A1000000": 2, "C999999": ""})
+    view = view_by_range(grid, "A1:C1000000")
+    mapped = map_2d(lambda x: round(x, 2) if isinstance(x, float) else x, view)
+    assert mapped.present_rows() == {
+        0: [1.23, "x"],
+        999998: [None, None, ""],
+        999999: [2],
+    }
+    assert list(view_by_range(grid, "A1:B1").cells()) == [1.23456, "x"]
+    assert map_2d(str, view_by_range(grid, "A2:A3")) == [[], []]
+
+
+@pytest.mark.parametrize(
+    "sct",
+    [
+        "Ex().has_equal_value()",
+        "Ex().has_equal_formula()",
+        "Ex().has_equal_references()",
+        "Ex().check_function('SUM')",
+        "Ex().check_operator('+')",
+        "Ex().has_code('SUM')",
+    ],
+)
+def test_grade_sparse_cost_by_cells(sct, monkeypatch):
+    def sheet(value, n_rows):
+        values = {"A1": 3, f"A{n_rows}": value}
+        formulas = {"A1": "=SUM(1 + 2)", f"A{n_rows}": f"=SUM({value} + B1)"}
+        return {"values": {"cells": values}, "formulas": {"cells": formulas}}
+
+    def dense(data):
+        return {field: SparseGrid(data[field]["cells"]).to_list() for field in data}
+
+    sct = [{"range": "A1:A1000000", "sct": [sct]}]
+    expected = [
+        te(sct, dense(sheet(value, 1000)), dense(sheet(2, 1000))) for value in [2, 5]
+    ]
+    # only the rows that have cells may be cut out, not the whole range
+    monkeypatch.setattr(SparseGrid, "window", None)
+    payloads = [te(sct, sheet(value, 1000000), sheet(2, 1000000)) for value in [2, 5]]
+    assert [payload["correct"] for payload in payloads] == [
+        payload["correct"] for payload in expected
+    ]
@@ -1,5 +1,8 @@
 import pytest
+from concurrent.futures import ThreadPoolExecutor
+from sheetwhat.sct_syntax import SCT_CTX
 from sheetwhat.test_exercise import test_exercise as te
+from sheetwhat.test_exercise import test_exercise_batch as te_batch
 
 
 @pytest.mark.parametrize(
@@ -47,3 +50,96 @@ def test_success_msg(success_msg, patt):
 def test_malformed(sct, student_data, solution_data):
     with pytest.raises(AssertionError):
         te(sct, student_data, solution_data)
+
+
+def test_batch():
+    sct = [
+        {"range": "A1", "sct": ["Ex().has_equal_value()"]},
+        {"range": "A1:B1", "sct": ["Ex().has_equal_formula()"]},
+    ]
+    solution_data = {"values": [["A", "A"]], "formulas": [["=A1", "=A1"]]}
+    students = [
+        {"values": [["A", "A"]], "formulas": [["=A1", "=A1"]]},
+        {"values": [["B", "A"]], "formulas": [["=A1", "=A1"]]},
+        {"values": [["A", "A"]], "formulas": [["=A1", "=B1"]]},
+    ]
+    results = te_batch(sct, solution_data, iter(students))
+    assert [result["correct"] for result in results] == [True, False, False]
+
+
+def test_batch_matches_single():
+    sct = [{"range": "A1", "sct": ["Ex().has_equal_references()"]}]
+    solution_data = {"formulas": [["=SUM(B1:B3)"]]}
+    students = [{"formulas": [["=SUM(B1:B3)"]]}, {"formulas": [["=SUM(B1:B4)"]]}]
+    assert list(te_batch(sct, solution_data, students)) == [
+        te(sct, student_data, solution_data) for student_data in students
+    ]
+
+
+def test_batch_malformed():
+    with pytest.raises(AssertionError):
+        te_batch({}, {}, [])
+
+
+def test_root_state_not_shared():
+    data = {"values": [["A"]], "formulas": [["=A1"]]}
+    te(sct=[{"range": "A1", "sct": ["x = 1"]}], student_data=data, solution_data=data)
+    assert SCT_CTX["Ex"].root_state is None
+    assert "x" not in SCT_CTX
+
+
+def test_concurrent():
+    sct = [{"range": "A1:B1", "sct": ["Ex().has_equal_value()"]}]
+    solution_data = {"values": [["A", "A"]]}
+    students = [{"values": [["A", "A" if i % 2 else "B"]]} for i in range(200)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda stu: te(sct, stu, solution_data)["correct"], students)
+        )
+    assert results == [bool(i % 2) for i in range(200)]
+
+
+def test_student_cache(monkeypatch):
+    from sheetwhat.checks import check_funcs
+
+    calls = []
+    original = check_funcs.is_empty
+
+    def is_empty(x):
+        calls.append(x)
+        return original(x)
+
+    monkeypatch.setattr(check_funcs, "is_empty", is_empty)
+    sct = [
+        {"range": "A1:B1", "sct": ["Ex().has_equal_value()"]},
+        {"range": "A1:B1", "sct": ["Ex().has_equal_value()"]},
+        {"range": "A1:B1", "sct": ["Ex().has_equal_formula()"]},
+        {"range": "A1", "sct": ["Ex().has_equal_value()"]},
+    ]
+    data = {"values": [["A", "A"]], "formulas": [["=A1", "=A1"]]}
+    assert te(sct, data, data)["correct"]
+    assert len(calls) == 3
+    assert te(sct, data, data)["correct"]
+    assert len(calls) == 6
+
+
+def test_student_cache_views_once():
+    from sheetwhat.State import State
+    from sheetwhat.checks.check_funcs import has_equal_formula, has_equal_references
+    from sheetwhat.utils import RangeView
+    from protowhat.Reporter import Reporter
+
+    data = {"formulas": [["=SUM(A2:A3)", "=A1 + 1"]]}
+    state = State(data, data, "A1:B1", reporter=Reporter())
+    for check in [has_equal_formula, has_equal_references, has_equal_formula]:
+        check(state)
+    assert state.student_cache == {
+        ("formulas", "A1:B1"): [["=SUM(A2:A3)", "=A1 + 1"]],
+        ("formulas", "A1:B1", "empty"): False,
+        ("formulas", "A1:B1", "normalize"): [["=sum(a2:a3)", "=a1+1"]],
+        ("formulas", "A1:B1", "reference_names"): [
+            [{"a2:a3", "a2", "a3"}, {"a1"}]
+        ],
+    }
+    # a lazy view on the data, not a copy
+    assert isinstance(state.student_cache[("formulas", "A1:B1")], RangeView)
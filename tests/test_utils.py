@@ -1,13 +1,19 @@
 import pytest
 
+from sheetwhat.sheet import Grid, SparseGrid
 from sheetwhat.utils import (
     letters_to_numbers,
     range_to_row_columns,
     crop_by_range,
+    view_by_range,
+    RangeView,
     is_empty,
     normalize_array_2d,
     map_2d,
     dict_keys,
+    DataOverlay,
+    find_mismatches,
+    cell_names,
 )
 
 
@@ -66,11 +72,61 @@ def test_crop_by_range(array_2d, range_spec, target):
     assert crop_by_range(array_2d, range_spec) == target
 
 
-def test_crop_by_range_deepcopy():
+@pytest.mark.parametrize(
+    "array_2d, range_spec, target",
+    [
+        ([[0, 1, 2], [3, 4, 5]], "A1", [[0]]),
+        ([[0, 1, 2], [3, 4, 5]], "A1:B2", [[0, 1], [3, 4]]),
+        ([[0, 1, 2], [3, 4, 5]], "B1:D2", [[1, 2], [4, 5]]),
+        ([[0, 1, 2], [3]], "B1:C2", [[1, 2], []]),
+        ([[0, 1, 2], [3, 4, 5]], "Z1", [[]]),
+        ([[0, 1, 2], [3, 4, 5]], "B3", [[]]),
+    ],
+)
+def test_view_by_range(array_2d, range_spec, target):
+    view = view_by_range(array_2d, range_spec)
+    assert view == target
+    assert target == view
+    assert view == view_by_range(target, "A1:Z100")
+    assert view.to_list() == target
+    assert list(view) == target
+    assert len(view) == len(target)
+    assert [view[i] for i in range(len(view))] == target
+    assert list(view.cells()) == [cell for row in target for cell in row]
+    assert view.map(str) == map_2d(str, target)
+
+
+@pytest.mark.parametrize(
+    "range_spec, other",
+    [
+        ("A1:B2", [[0, 1], [3, 5]]),
+        ("A1:B2", [[0, 1]]),
+        ("A1:B2", [[0, 1], [3, 4], [6, 7]]),
+        ("A1:B2", [[0, 1], [3]]),
+        ("A1", 0),
+    ],
+)
+def test_view_by_range_not_equal(range_spec, other):
+    view = view_by_range([[0, 1, 2], [3, 4, 5]], range_spec)
+    assert view != other
+
+
+def test_view_by_range_no_copy():
+    array_2d = [[0, 1, 2], [3, 4, 5]]
+    view = view_by_range(array_2d, "B2")
+    array_2d[1][1] = 10
+    assert view == [[10]]
+    with pytest.raises(IndexError):
+        view[1]
+
+
+def test_crop_by_range_no_copy():
     obj = {"test": "what"}
-    b = crop_by_range([[obj]], "A1")
-    b[0][0]["test"] = "that"
-    assert obj["test"] == "what"
+    array_2d = [[obj, 1]]
+    b = crop_by_range(array_2d, "A1")
+    assert b[0][0] is obj
+    b[0].append(2)
+    assert array_2d == [[obj, 1]]
 
 
 @pytest.mark.parametrize(
@@ -86,12 +142,51 @@ def test_crop_by_range_deepcopy():
         ([[""]], True),
         ([[0]], False),
         ([""], True),
+        (RangeView([[1, None], [1, ""]], 0, 2, 1, 2), True),
+        (RangeView([[1, None], [1, ""]], 0, 2, 0, 2), False),
+        ([[None, [[], [""]]], [{}, None]], True),
+        ([[None, [[], [""]]], [{}, [[[0]]]]], False),
+        ([[RangeView([[1, None]], 0, 1, 1, 2)], [None]], True),
+        ([[RangeView([[1, None]], 0, 1, 0, 2)], [None]], False),
     ],
 )
 def test_is_empty(obj, empty):
     assert is_empty(obj) == empty
 
 
+def test_is_empty_view_stops_at_first_cell():
+    class UnreadRow(list):
+        def __getitem__(self, index):
+            raise AssertionError("only the first row has to be read")
+
+    array_2d = [[None, 1]] + [UnreadRow([None, None])] * 100000
+    assert not is_empty(view_by_range(array_2d, "A1:B100001"))
+
+
+@pytest.mark.parametrize(
+    "array_2d, range_spec",
+    [
+        ([[0, 1, 2], [3, 4, 5]], "B1:C2"),
+        ([[0, 1, 2], [3], []], "A1:C3"),
+        ([[0, 1, 2], [3, 4, 5]], "D5:E6"),
+        (Grid([[0, 1, 2], [3], []]), "B1:C3"),
+        (SparseGrid({"A1": 0, "C3": 1, "B7": 2}), "B1:C6"),
+    ],
+)
+def test_n_cells(array_2d, range_spec):
+    view = view_by_range(array_2d, range_spec)
+    assert view.n_cells() == sum(map(len, view))
+
+
+def test_n_cells_reads_no_cells():
+    class UnreadRow(list):
+        def __getitem__(self, index):
+            raise AssertionError("counting cells doesn't read them")
+
+    view = view_by_range([UnreadRow([None, 1, 2])] * 10, "B1:C10")
+    assert view.n_cells() == 20
+
+
 @pytest.mark.parametrize(
     "array_2d, target",
     [
@@ -130,3 +225,60 @@ def test_map_2d(array_2d, func, target):
 )
 def test_dict_keys(dicts, result):
     assert dict_keys(*dicts) == result
+
+
+def test_data_overlay():
+    data = {"values": [[1]], "formulas": [["=1"]]}
+    overlay = DataOverlay(data, {"values": [[2]]})
+    assert overlay["values"] == [[2]]
+    assert overlay["formulas"] is data["formulas"]
+    assert dict(overlay) == {"values": [[2]], "formulas": [["=1"]]}
+    assert len(overlay) == 2
+    assert data["values"] == [[1]]
+    with pytest.raises(KeyError):
+        overlay["charts"]
+
+
+def test_data_overlay_nested():
+    data = {"values": [[1]], "formulas": [["=1"]]}
+    overlay = DataOverlay(DataOverlay(data, {"values": [[2]]}), {"formulas": [["=2"]]})
+    assert overlay.data is data
+    assert overlay == {"values": [[2]], "formulas": [["=2"]]}
+
+
+@pytest.mark.parametrize(
+    "student, solution, limit, mismatches",
+    [
+        ([[1, 2], [3, 4]], [[1, 2], [3, 4]], 1, []),
+        ([[1, 2], [3, 4]], [[1, 0], [0, 4]], 1, [(0, 1)]),
+        ([[1, 2], [3, 4]], [[1, 0], [0, 4]], 5, [(0, 1), (1, 0)]),
+        ([[1, 2], [3, 4]], [[0, 0], [0, 0]], None, [(0, 0), (0, 1), (1, 0), (1, 1)]),
+        ([[1, 2], [3]], [[1, 2], [3, 4]], None, [(1, 1)]),
+        ([[1, 2]], [[1, 2], [3]], None, [(1, 0)]),
+        ([[]], [[1]], None, [(0, 0)]),
+    ],
+)
+def test_find_mismatches(student, solution, limit, mismatches):
+    assert find_mismatches(student, solution, limit=limit) == mismatches
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_find_mismatches_invalid_limit(limit):
+    with pytest.raises(ValueError, match="at least 1"):
+        find_mismatches([[1, 2, 3]], [[0, 0, 0]], limit=limit)
+
+
+def test_find_mismatches_equal():
+    assert find_mismatches([["A"]], [["a"]], lambda x, y: x.lower() == y) == []
+
+
+@pytest.mark.parametrize(
+    "range_spec, indices, names",
+    [
+        ("A1", [(0, 0)], ["A1"]),
+        ("B2:D4", [(0, 0), (2, 1)], ["B2", "C4"]),
+        ("Y10:AB12", [(1, 2)], ["AA11"]),
+    ],
+)
+def test_cell_names(range_spec, indices, names):
+    assert cell_names(range_spec, indices) == names
@@ -0,0 +1,154 @@
+import pytest
+import random
+from tests.helper import setup_state, verify_success
+from sheetwhat import vectorized
+from sheetwhat.checks import has_equal_value
+from sheetwhat.utils import find_mismatches, round_array_2d, round_value, view_by_range
+
+np = pytest.importorskip("numpy")
+
+
+def random_values(n_rows, n_columns, seed):
+    rng = random.Random(seed)
+    choices = [
+        lambda: rng.randint(-5, 5),
+        lambda: rng.uniform(-5, 5),
+        lambda: rng.choice(["a", "b", "", None, True]),
+    ]
+    return [[rng.choice(choices)() for _ in range(n_columns)] for _ in range(n_rows)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mismatches_like_round(seed):
+    student = random_values(20, 10, seed)
+    solution = random_values(20, 10, seed + 100)
+    for i, j in [(0, 0), (3, 4), (19, 9)]:
+        solution[i][j] = student[i][j]
+    solution[5][5] = 1.00001 if student[5][5] == 1 else student[5][5]
+
+    rounded_student = round_array_2d(student, 4)
+    rounded_solution = round_array_2d(solution, 4)
+    expected = [
+        (i, j)
+        for i in range(20)
+        for j in range(10)
+        if rounded_student[i][j] != rounded_solution[i][j]
+    ]
+
+    mismatches = vectorized.ValueGrid(student, 4).mismatches(
+        vectorized.ValueGrid(solution, 4)
+    )
+    assert mismatches == expected
+
+
+def test_mismatches_limit():
+    grid = vectorized.ValueGrid([[1, 2, 3]], 4)
+    other = vectorized.ValueGrid([[0, 0, 0]], 4)
+    assert grid.mismatches(other, limit=2) == [(0, 0), (0, 1)]
+    with pytest.raises(ValueError):
+        grid.mismatches(other, limit=0)
+
+
+@pytest.mark.parametrize(
+    "student, solution, result",
+    [
+        ([[1] * 50] * 20, [[1] * 50] * 20, True),
+        ([[1] * 50] * 20, [[1] * 50] * 19, False),
+        ([[1] * 50] * 19 + [[1] * 49], [[1] * 50] * 20, False),
+        ([[1] * 10] * 10, [[1] * 10] * 10, False),
+        ([[1] * 50] * 20, [[1] * 50] * 19 + [[2**53] * 50], True),
+        ([[1] * 50] * 20, [[1] * 50] * 19 + [[-(2**53) - 1] * 50], False),
+    ],
+)
+def test_can_vectorize(student, solution, result):
+    assert vectorized.can_vectorize(student, solution) == result
+
+
+@pytest.mark.parametrize(
+    "i, j, value, correct",
+    [
+        (0, 0, 1.00001, True),
+        (39, 49, 1.001, False),
+        (20, 10, "1", False),
+        (20, 10, None, False),
+    ],
+)
+def test_has_equal_value_vectorized(i, j, value, correct):
+    solution = [[1] * 50 for _ in range(40)]
+    student = [[1] * 50 for _ in range(40)]
+    student[i][j] = value
+    assert vectorized.can_vectorize(
+        view_by_range(student, "A1:AX40"), view_by_range(solution, "A1:AX40")
+    )
+    s = setup_state({"values": student}, {"values": solution}, "A1:AX40")
+    with verify_success(correct):
+        has_equal_value(s)
+
+
+@pytest.mark.parametrize("n_rows", [2, 40])
+@pytest.mark.parametrize(
+    "student_value, solution_value, correct",
+    [
+        (2**1100, 1, False),
+        (2**1100, 2**1100, True),
+        (2**60, 2**60 + 1, False),
+        (2**60, 2**60, True),
+    ],
+)
+def test_has_equal_value_large_ints(n_rows, student_value, solution_value, correct):
+    # the same result for small ranges and ranges that could be vectorized
+    solution = [[1] * 50 for _ in range(n_rows)]
+    student = [[1] * 50 for _ in range(n_rows)]
+    student[1][1] = student_value
+    solution[1][1] = solution_value
+    sct_range = f"A1:AX{n_rows}"
+    s = setup_state({"values": student}, {"values": solution}, sct_range)
+    with verify_success(correct):
+        has_equal_value(s)
+
+
+def halfway_values(n_rows, n_columns, seed):
+    # ties at the fifth digit, which aren't exactly representable as floats
+    rng = random.Random(seed)
+    return [
+        [
+            rng.randint(0, 10**7) / 10**5 + 0.000005 * rng.choice([0, 1])
+            for _ in range(n_columns)
+        ]
+        for _ in range(n_rows)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mismatches_halfway_like_round(seed):
+    student = halfway_values(40, 50, seed)
+    solution = [[round(x, 4) for x in row] for row in student]
+    solution[3][7] += 0.0001
+
+    expected = find_mismatches(
+        student,
+        round_array_2d(solution, 4),
+        lambda x, rounded: round_value(x, 4) == rounded,
+        limit=None,
+    )
+    assert (3, 7) in expected
+    mismatches = vectorized.ValueGrid(student, 4).mismatches(
+        vectorized.ValueGrid(solution, 4)
+    )
+    assert mismatches == expected
+
+
+@pytest.mark.parametrize("n_rows", [2, 40])
+@pytest.mark.parametrize(
+    "student_value, solution_value, correct",
+    [(98.27855, 98.2785, True), (98.27855, 98.2786, False), (0.12345, 0.1235, True)],
+)
+def test_has_equal_value_halfway(n_rows, student_value, solution_value, correct):
+    # the same result for small ranges and ranges that are vectorized
+    solution = [[1.5] * 50 for _ in range(n_rows)]
+    student = [[1.5] * 50 for _ in range(n_rows)]
+    student[1][1] = student_value
+    solution[1][1] = solution_value
+    s = setup_state({"values": student}, {"values": solution}, f"A1:AX{n_rows}")
+    with verify_success(correct):
+        has_equal_value(s)